@@ -0,0 +1,110 @@
+import datetime
+import threading
+from collections import deque
+
+from money import round_kd, to_kd
+from variance import ancestor_categories
+
+# Budget alerts: an expense category (with everything under it) that reaches
+# one of these percentages of its budget raises an alert, once per crossing.
+# Highest first: (percent, level, message)
+BUDGET_THRESHOLDS = [
+    (100, "error", "{category} is over budget: KD {actual:.2f} of KD {budget:.2f}"),
+    (80, "warning", "{category} has used {percent:.0f}% of its budget: KD {actual:.2f} of KD {budget:.2f}")
+]
+
+RESERVE_MESSAGE = "Balance KD {balance:.2f} is below the emergency reserve of KD {reserve:.2f}"
+
+# Alerts kept for the sidebar feed
+KEEP_ALERTS = 50
+
+
+class AlertMonitor:
+    # Subscribes to the book and checks the threshold rules after every
+    # posting and budget edit. Only the rules of the categories a change
+    # touched (and their parents, whose subtree totals moved with them) are
+    # checked, against the totals the variance table and the ledger keep up
+    # to date, plus the reserve rule, which reads the ledger's running totals.
+    # Alerts are raised when a rule starts failing, kept for the sidebar feed
+    # and appended to a log file.
+
+    def __init__(self, book, log_path, reserve_rate):
+        self.log_path = log_path
+        self.reserve_rate = reserve_rate
+        self.lock = threading.Lock()
+        self.alerts = deque(maxlen=KEEP_ALERTS)
+        # (section, category) -> index in BUDGET_THRESHOLDS of the highest
+        # threshold reached
+        self._levels = {}
+        self._below_reserve = False
+        book.subscribe(self.on_change)
+        # Rules already failing when the app starts are shown, not logged again
+        with self.lock:
+            self._check_all(book.snapshot(), log=False)
+
+    def on_change(self, event, snapshot):
+        with self.lock:
+            if event.touched is None:
+                self._check_all(snapshot)
+                return
+            checked = set()
+            for section, category in event.touched:
+                for key in [(section, parent) for parent in ancestor_categories(category)] + [(section, category)]:
+                    if key not in checked:
+                        checked.add(key)
+                        self._check_category(snapshot, *key)
+            self._check_reserve(snapshot)
+
+    def _check_all(self, snapshot, log=True):
+        for category in snapshot.budget["expenses"]:
+            self._check_category(snapshot, "expenses", category, log)
+        self._check_reserve(snapshot, log)
+
+    def _check_category(self, snapshot, section, category, log=True):
+        if section != "expenses":
+            return
+        totals = snapshot.variance.subtree(section, category)
+        budget, actual = totals if totals else (0, 0)
+        level = None
+        if budget > 0:
+            for index, (percent, _, _) in enumerate(BUDGET_THRESHOLDS):
+                if actual * 100 >= budget * percent:
+                    level = index
+                    break
+        previous = self._levels.get((section, category))
+        if level is None:
+            self._levels.pop((section, category), None)
+            return
+        self._levels[(section, category)] = level
+        if previous is None or level < previous:
+            _, severity, message = BUDGET_THRESHOLDS[level]
+            self._raise(severity, message.format(category=category, budget=to_kd(budget), actual=to_kd(actual),
+                                                 percent=actual * 100 / budget), log)
+
+    def _check_reserve(self, snapshot, log=True):
+        ledger = snapshot.ledger
+        balance = to_kd(ledger.income_fils - ledger.expense_fils)
+        reserve = round_kd(to_kd(ledger.income_fils) * self.reserve_rate)
+        below = balance < reserve
+        if below and not self._below_reserve:
+            self._raise("error", RESERVE_MESSAGE.format(balance=balance, reserve=reserve), log)
+        self._below_reserve = below
+
+    def _raise(self, severity, message, log=True):
+        alert = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "level": severity,
+            "message": message
+        }
+        self.alerts.appendleft(alert)
+        if log:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(f"{alert['time']} {severity.upper()} {message}\n")
+            except OSError:
+                # The feed still has it
+                pass
+
+    def recent(self, count=10):
+        with self.lock:
+            return list(self.alerts)[:count]
@@ -0,0 +1,214 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+from collections import deque, namedtuple
+
+from money import to_kd
+
+# Audit trail: every change the book records, one JSON line per entry, never
+# rewritten. Each entry carries the hash of the one before it and its own
+# hash covers that, so changing, removing or reordering any entry breaks the
+# chain from there on. Every CHECKPOINT_EVERY entries the position and hash
+# of an entry are written to a checkpoint file, so a check can start from the
+# last checkpoint instead of rehashing the whole history.
+
+CHECKPOINT_EVERY = 1000
+
+# prev of the first entry
+GENESIS_HASH = "0" * 64
+GENESIS = {"seq": 0, "hash": GENESIS_HASH, "offset": 0}
+
+# Result of walking the chain: how many entries were checked, the last good
+# entry and what was wrong, if anything
+AuditCheck = namedtuple("AuditCheck", ["ok", "checked", "last_seq", "problem"])
+
+def entry_hash(entry):
+    # SHA-256 of the entry (without its own hash) as canonical JSON
+    body = {key: value for key, value in entry.items() if key != "hash"}
+    text = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def state_summary(snapshot):
+    # What a restore (or the start of the log) left the books holding
+    ledger = snapshot.ledger
+    return {
+        "transactions": len(ledger),
+        "total_income": str(to_kd(ledger.income_fils)),
+        "total_expenses": str(to_kd(ledger.expense_fils)),
+        "events": len(snapshot.events),
+        "fundraising": len(snapshot.fundraising),
+        "budget": snapshot.budget
+    }
+
+def _parse(line):
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+class AuditLog:
+    # Append-only, hash-chained log of the book's changes, kept in the data
+    # directory next to the snapshot and write-ahead log. The write-ahead log
+    # is truncated whenever it is compacted; this one never is. Restores are
+    # logged as a summary of what was restored.
+
+    def __init__(self, data_dir, checkpoint_every=CHECKPOINT_EVERY):
+        self.log_path = os.path.join(data_dir, "audit.jsonl")
+        self.checkpoint_path = os.path.join(data_dir, "audit_checkpoints.jsonl")
+        self.checkpoint_every = checkpoint_every
+        self.lock = threading.Lock()
+        self._log = None
+        os.makedirs(data_dir, exist_ok=True)
+        self.checkpoints = self._read_checkpoints()
+        # The chain is checked from the last checkpoint on opening, which also
+        # finds its tail: last entry, its hash and where the next one goes
+        self.open_check, (self.seq, self.head, self._offset) = self._walk(self.checkpoints[-1])
+        if not self.open_check.ok:
+            self.seq, self.head, self._offset = self._tail()
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > self._offset:
+            # Torn write at the tail of the log
+            with open(self.log_path, "r+b") as f:
+                f.truncate(self._offset)
+
+    def _read_checkpoints(self):
+        checkpoints = [GENESIS]
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                for line in f:
+                    checkpoint = _parse(line)
+                    if checkpoint is None:
+                        break
+                    checkpoints.append(checkpoint)
+        return checkpoints
+
+    def _walk(self, start, end=None, checkpoints=None):
+        # Check the chain from a checkpoint (including the entry it points
+        # at) up to the end offset or the end of the file. Returns the
+        # AuditCheck and the tail (seq, hash, offset) after the last good
+        # entry. checkpoints ({seq: hash}) are compared on the way.
+        seq, prev, offset = start["seq"], start["hash"], start["offset"]
+        checked = 0
+        problem = None
+        if not os.path.exists(self.log_path):
+            if seq:
+                problem = "The audit log is missing"
+            return AuditCheck(problem is None, 0, seq, problem), (seq, prev, offset)
+        with open(self.log_path, "rb") as f:
+            f.seek(offset)
+            if seq:
+                entry = _parse(f.readline())
+                if entry is None or entry.get("seq") != seq or entry.get("hash") != prev \
+                        or entry_hash(entry) != prev:
+                    problem = f"Checkpointed entry {seq} has been changed or removed"
+                    return AuditCheck(False, 0, seq - 1, problem), (seq, prev, offset)
+                checked += 1
+                offset = f.tell()
+            while end is None or offset < end:
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    # End of the log, or a torn write at its tail
+                    break
+                entry = _parse(line)
+                if entry is None:
+                    problem = f"The entry after {seq} cannot be read"
+                elif entry.get("seq") != seq + 1:
+                    problem = f"Entry {seq + 1} is missing or out of order"
+                elif entry.get("prev") != prev:
+                    problem = f"Entry {seq + 1} does not follow entry {seq}"
+                elif entry_hash(entry) != entry.get("hash"):
+                    problem = f"Entry {seq + 1} has been changed"
+                elif checkpoints and checkpoints.get(seq + 1, entry["hash"]) != entry["hash"]:
+                    problem = f"Entry {seq + 1} does not match its checkpoint"
+                if problem:
+                    break
+                seq, prev, offset = entry["seq"], entry["hash"], f.tell()
+                checked += 1
+        return AuditCheck(problem is None, checked, seq, problem), (seq, prev, offset)
+
+    def _tail(self):
+        # Last complete entry of a log whose chain is broken, so new entries
+        # still follow on from it
+        seq, prev, offset = 0, GENESIS_HASH, 0
+        if not os.path.exists(self.log_path):
+            return seq, prev, offset
+        with open(self.log_path, "rb") as f:
+            for line in iter(f.readline, b""):
+                if not line.endswith(b"\n"):
+                    break
+                entry = _parse(line)
+                if entry is not None and "seq" in entry and "hash" in entry:
+                    seq, prev = entry["seq"], entry["hash"]
+                offset = f.tell()
+        return seq, prev, offset
+
+    def watch(self, book):
+        # Log every change the book records from now on. A new log starts
+        # with a summary of the books as they were when it was started.
+        book.subscribe(self.on_change)
+        if self.seq == 0:
+            self.append("start", state_summary(book.snapshot()))
+
+    def on_change(self, event, snapshot):
+        data = state_summary(snapshot) if event.op == "restore" else event.data
+        self.append(event.op, data)
+
+    def append(self, op, data):
+        with self.lock:
+            entry = {
+                "seq": self.seq + 1,
+                "time": datetime.datetime.now().isoformat(timespec="seconds"),
+                "op": op,
+                "data": data,
+                "prev": self.head
+            }
+            entry["hash"] = entry_hash(entry)
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            if self._log is None:
+                self._log = open(self.log_path, "ab")
+            self._log.write(line)
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            start = self._offset
+            self.seq, self.head, self._offset = entry["seq"], entry["hash"], start + len(line)
+            if self.seq % self.checkpoint_every == 0:
+                self._checkpoint({"seq": self.seq, "hash": self.head, "offset": start, "time": entry["time"]})
+
+    def _checkpoint(self, checkpoint):
+        with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(checkpoint) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.checkpoints.append(checkpoint)
+
+    def verify(self, full=False):
+        # Check the chain from the last checkpoint, or the whole history
+        # (and every checkpoint) if full, up to the last entry written
+        with self.lock:
+            end, last_seq = self._offset, self.seq
+            start = self.checkpoints[0] if full else self.checkpoints[-1]
+            checkpoints = {checkpoint["seq"]: checkpoint["hash"] for checkpoint in self.checkpoints[1:]}
+        check, _ = self._walk(start, end, checkpoints if full else None)
+        if check.ok and check.last_seq != last_seq:
+            return check._replace(ok=False, problem=f"The log ends at entry {check.last_seq} of {last_seq}")
+        return check
+
+    def recent(self, count=20):
+        # The last count entries, newest first, read from the checkpoint
+        # before them
+        with self.lock:
+            end, last_seq = self._offset, self.seq
+            start = [checkpoint for checkpoint in self.checkpoints if checkpoint["seq"] <= last_seq - count][-1:]
+        entries = deque(maxlen=count)
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path, "rb") as f:
+            f.seek(start[0]["offset"] if start else 0)
+            while f.tell() < end:
+                entry = _parse(f.readline())
+                if entry is not None:
+                    entries.append(entry)
+        return list(reversed(entries))
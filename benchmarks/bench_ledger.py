@@ -0,0 +1,295 @@
+"""Headless benchmarks of the ledger operations at several scales.
+
+For each scale a synthetic ledger (with events and fundraising initiatives
+linked to some of its transactions) is restored into a fresh data directory,
+then the core functions are timed through finance.py exactly as the pages
+call them, with no Streamlit server. A second pass under tracemalloc records
+the peak memory of each operation. Results are printed, and written as JSON
+with --output; --baseline compares them with an earlier run and exits with
+status 1 when an operation got slower than the tolerance allows.
+
+    python benchmarks/bench_ledger.py --output before.json
+    python benchmarks/bench_ledger.py --baseline before.json --tolerance 0.25
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the app's data directory out of it; each scale gets its own below
+os.environ.setdefault("COMMITTEE_DATA_DIR", tempfile.mkdtemp(prefix="committee-bench-"))
+# The cached helpers warn about the missing Streamlit runtime on every call
+logging.disable(logging.WARNING)
+
+import finance
+from book import default_budget
+from formatting import blank_zero_amounts
+from ledger import Ledger
+from storage import parquet_available, read_backup, read_parquet_backup, write_backup, write_parquet_backup
+
+SCALES = [1000, 100000, 1000000]
+
+AUTHORIZERS = ["Chair", "Treasurer", "School Admin", "Committee Vote"]
+
+# Columns shown in the transaction history
+HISTORY_COLUMNS = ["date", "description", "category", "income", "expense", "authorized_by", "receipt_num", "notes"]
+
+def synthetic_data(count, seed=0):
+    # A backup (as read_backup() returns it) with count transactions spread
+    # over three years, one event per 1000 transactions and one initiative
+    # per 2000; about a third of the transactions are linked to them
+    rng = np.random.default_rng(seed)
+    budget = default_budget()
+    income_categories = list(budget["income"])
+    expense_categories = list(budget["expenses"])
+    event_count = max(5, count // 1000)
+    initiative_count = max(3, count // 2000)
+
+    is_income = rng.random(count) < 0.4
+    categories = np.where(is_income,
+                          np.array(income_categories, dtype=object)[rng.integers(len(income_categories), size=count)],
+                          np.array(expense_categories, dtype=object)[rng.integers(len(expense_categories), size=count)])
+    amounts = np.round(rng.lognormal(3.5, 1.0, count), 3)
+    start = np.datetime64("2023-01-01T08:00", "s")
+    timestamps = np.sort(start + rng.integers(0, 3 * 365 * 86400, count).astype("timedelta64[s]"))
+    dates = timestamps.astype("datetime64[D]") - rng.integers(0, 5, count).astype("timedelta64[D]")
+    event_ids = np.where(rng.random(count) < 0.2, rng.integers(1, event_count + 1, count), 0)
+    initiative_ids = np.where(rng.random(count) < 0.15, rng.integers(1, initiative_count + 1, count), 0)
+    frame = pd.DataFrame({
+        "date": dates.astype("datetime64[ns]"),
+        "description": [f"Transaction {i}" for i in range(count)],
+        "category": categories,
+        "income": np.where(is_income, amounts, 0.0),
+        "expense": np.where(is_income, 0.0, amounts),
+        "authorized_by": np.array(AUTHORIZERS, dtype=object)[rng.integers(len(AUTHORIZERS), size=count)],
+        "receipt_num": [f"R{i:07d}" for i in range(count)],
+        "notes": "",
+        "timestamp": timestamps.astype("datetime64[ns]"),
+        "event_id": event_ids,
+        "initiative_id": initiative_ids
+    })
+
+    # Budget actuals and linked actuals consistent with the transactions
+    for section, amount in [("income", "income"), ("expenses", "expense")]:
+        totals = frame.groupby("category")[amount].sum()
+        for category, values in budget[section].items():
+            values["budget"] = float(round(totals.get(category, 0.0) * 1.1, -2))
+            values["actual"] = float(totals.get(category, 0.0))
+    linked_events = frame.groupby("event_id")[["income", "expense"]].sum()
+    events = [{
+        "id": i,
+        "name": f"Event {i}",
+        "date": str(np.datetime64("2023-01-15") + int(i * 1095 / event_count)),
+        "location": "School Hall",
+        "coordinator": "TBD",
+        "projected_income": 5000.0,
+        "projected_expenses": 3000.0,
+        "actual_income": float(linked_events["income"].get(i, 0.0)),
+        "actual_expenses": float(linked_events["expense"].get(i, 0.0)),
+        "income_sources": [],
+        "expense_items": [],
+        "status": "Completed" if i < event_count * 0.8 else "Planning"
+    } for i in range(1, event_count + 1)]
+    linked_initiatives = frame.groupby("initiative_id")[["income", "expense"]].sum()
+    fundraising = [{
+        "id": i,
+        "name": f"Initiative {i}",
+        "dates": "Term 1",
+        "coordinator": "TBD",
+        "goal_amount": 10000.0,
+        "actual_raised": float(linked_initiatives["income"].get(i, 0.0)),
+        "expenses": float(linked_initiatives["expense"].get(i, 0.0)),
+        "net_proceeds": float(linked_initiatives["income"].get(i, 0.0) - linked_initiatives["expense"].get(i, 0.0)),
+        "status": "Active"
+    } for i in range(1, initiative_count + 1)]
+    return {"budget": budget, "events": events, "fundraising": fundraising, "ledger": Ledger.from_frame(frame)}
+
+def history_page(filters, page_size=50):
+    # The transaction history as the Transactions page builds it: filtered,
+    # newest first, one page turned into a table
+    ledger = finance.get_book().snapshot().ledger
+    rows = ledger.select(**filters)[::-1]
+    return blank_zero_amounts(ledger.frame().iloc[rows[:page_size]][HISTORY_COLUMNS])
+
+def operations(work_dir):
+    # name -> (setup, run): setup() runs untimed before every run()
+    posting = {"n": 0}
+
+    def post():
+        posting["n"] += 1
+        ok, message = finance.add_transaction(
+            "2025-12-01", f"Benchmark posting {posting['n']}", "Event Expenses",
+            expense=12.5, authorized_by="Chair", event_id=1)
+        assert ok, message
+
+    backup_path = os.path.join(work_dir, "backup.jsonl")
+    parquet_path = os.path.join(work_dir, "backup.zip")
+
+    def save_jsonl():
+        with open(backup_path, "w", encoding="utf-8") as f:
+            write_backup(f, finance.get_book().snapshot())
+
+    def save_parquet():
+        with open(parquet_path, "wb") as f:
+            write_parquet_backup(f, finance.get_book().snapshot())
+
+    def load_jsonl():
+        with open(backup_path, encoding="utf-8") as f:
+            finance.get_book().restore(read_backup(f))
+
+    def load_parquet():
+        with open(parquet_path, "rb") as f:
+            finance.get_book().restore(read_parquet_backup(f))
+
+    def nothing():
+        pass
+
+    ops = {
+        "add_transaction": (nothing, post),
+        "get_balance": (nothing, finance.get_balance),
+        "get_emergency_reserve": (nothing, finance.get_emergency_reserve),
+        "generate_monthly_report": (nothing, lambda: finance.generate_monthly_report(6, 2024)),
+        "generate_monthly_report_by_date": (nothing, lambda: finance.generate_monthly_report(6, 2024, by="date")),
+        "generate_ytd_report": (nothing, lambda: finance.generate_ytd_report(2024)),
+        # After a posting the snapshot's ledger view is new, so its table is
+        # built from scratch, as on the rerun that follows a form submit
+        "history_page": (post, lambda: history_page({})),
+        "history_page_filtered": (post, lambda: history_page({
+            "start": datetime.date(2024, 3, 1), "end": datetime.date(2024, 8, 31),
+            "categories": ["Graduation", "Yearbook"], "min_amount": 20.0})),
+        "save_data_jsonl": (nothing, save_jsonl),
+        "load_data_jsonl": (nothing, load_jsonl)
+    }
+    if parquet_available():
+        ops["save_data_parquet"] = (nothing, save_parquet)
+        # The restore with a stated target: well under a second at 1M rows
+        ops["load_data_parquet"] = (nothing, load_parquet)
+    return ops
+
+# Each operation is run until it has this many samples or has used up the
+# time budget (at least one sample is always taken)
+SAMPLES = 50
+TIME_BUDGET = 5.0
+
+def time_operation(setup, run, samples, budget):
+    times = []
+    spent = 0.0
+    while len(times) < samples and (not times or spent < budget):
+        setup()
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        times.append(elapsed)
+        spent += elapsed
+    return times
+
+def peak_memory(setup, run):
+    setup()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def bench_scale(count, samples, budget):
+    with tempfile.TemporaryDirectory(prefix="committee-bench-") as work_dir:
+        # A fresh book on an empty data directory
+        finance.DATA_DIR = os.path.join(work_dir, "data")
+        finance.get_book.clear()
+        finance.get_audit_log.clear()
+        start = time.perf_counter()
+        finance.get_book().restore(synthetic_data(count))
+        print(f"{count:>9,} transactions seeded in {time.perf_counter() - start:.1f} s")
+
+        results = []
+        for name, (setup, run) in operations(work_dir).items():
+            times = time_operation(setup, run, samples, budget)
+            peak = peak_memory(setup, run)
+            result = {
+                "scale": count,
+                "operation": name,
+                "samples": len(times),
+                "median_s": statistics.median(times),
+                "min_s": min(times),
+                "max_s": max(times),
+                "peak_bytes": peak
+            }
+            results.append(result)
+            print(f"{'':>9} {name:<32} {result['median_s'] * 1000:10.3f} ms  "
+                  f"(n={len(times)}, peak {peak / 2 ** 20:8.1f} MiB)")
+        finance.get_book.clear()
+        finance.get_audit_log.clear()
+    return results
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "run_at": datetime.datetime.now().isoformat(timespec="seconds")
+    }
+
+def compare(results, baseline_path, tolerance):
+    # Median times against the baseline; returns the regressions
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["operation"]): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        before = baseline.get((result["scale"], result["operation"]))
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"] if before["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions.append(result)
+        print(f"{result['scale']:>9,} {result['operation']:<32} {ratio:6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="*", default=SCALES)
+    parser.add_argument("--samples", type=int, default=SAMPLES, help="samples per operation")
+    parser.add_argument("--time-budget", type=float, default=TIME_BUDGET,
+                        help="seconds per operation before sampling stops early")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="slowdown allowed against the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = []
+    for count in args.scales:
+        results.extend(bench_scale(count, args.samples, args.time_budget))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "ledger", "environment": environment(), "results": results}, f, indent=2)
+    if args.baseline and compare(results, args.baseline, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
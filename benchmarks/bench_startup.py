@@ -0,0 +1,72 @@
+"""Time to first paint of each page, from a cold Python process.
+
+Every sample starts a new interpreter that runs the app once, headless
+through Streamlit's AppTest, on the given page, then once more to show the
+cost of a warm rerun. The interpreter start and the AppTest import are not
+counted. Results are printed, and written as JSON with --output.
+
+    python benchmarks/bench_startup.py --repeat 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ["dashboard", "transactions", "budget", "events", "fundraising", "reports", "settings"]
+
+# Runs in the child process; prints the timings as JSON
+CHILD = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.session_state["page"] = sys.argv[2]
+start = time.perf_counter()
+at.run()
+first = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(at.exception[0].value)
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+print(json.dumps({"first_run": first, "rerun": rerun, "modules": len(sys.modules)}))
+"""
+
+def sample(page, data_dir):
+    env = dict(os.environ, COMMITTEE_DATA_DIR=data_dir)
+    output = subprocess.run([sys.executable, "-c", CHILD, os.path.join(ROOT, "app.py"), page],
+                            env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pages", nargs="*", default=PAGES, choices=PAGES)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for page in args.pages:
+            samples = [sample(page, data_dir) for _ in range(args.repeat)]
+            result = {
+                "page": page,
+                "first_run_s": statistics.median(s["first_run"] for s in samples),
+                "rerun_s": statistics.median(s["rerun"] for s in samples),
+                "modules": samples[-1]["modules"]
+            }
+            results.append(result)
+            print(f"{page:<13} first paint {result['first_run_s'] * 1000:8.1f} ms   "
+                  f"rerun {result['rerun_s'] * 1000:7.1f} ms   {result['modules']} modules")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"benchmark": "startup", "repeat": args.repeat, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+from cube import Cube
+from ledger import COLUMNS, Ledger
+from money import add_fils, to_fils, to_fils_array
+from registry import Registry
+from rules import AuthorizationEngine, default_auth_rules
+from variance import VarianceTable, ancestor_categories
+
+
+# Default budget categories
+def default_budget():
+    return {
+        "income": {
+            "Fundraising Events": {"budget": 0, "actual": 0},
+            "Merchandise Sales": {"budget": 0, "actual": 0},
+            "Sponsorships": {"budget": 0, "actual": 0},
+            "Other Income": {"budget": 0, "actual": 0}
+        },
+        "expenses": {
+            "Event Expenses": {"budget": 0, "actual": 0},
+            "Merchandise Production": {"budget": 0, "actual": 0},
+            "Marketing/Promotion": {"budget": 0, "actual": 0},
+            "Yearbook": {"budget": 0, "actual": 0},
+            "Graduation": {"budget": 0, "actual": 0},
+            "School Trips": {"budget": 0, "actual": 0},
+            "Emergency Reserve": {"budget": 0, "actual": 0},
+            "Other Expenses": {"budget": 0, "actual": 0}
+        }
+    }
+
+# Changes are applied through these functions both when they happen and when
+# they are replayed from the write-ahead log, so both paths stay identical
+def apply_transaction(state, transaction):
+    # The ledger keeps its running totals up to date
+    state.ledger.append(
+        transaction["date"],
+        transaction["description"],
+        transaction["category"],
+        transaction["income"],
+        transaction["expense"],
+        transaction["authorized_by"],
+        transaction["receipt_num"],
+        transaction["notes"],
+        transaction["timestamp"],
+        transaction.get("event_id"),
+        transaction.get("initiative_id")
+    )
+
+    # Update budget actuals (added up in fils)
+    category = transaction["category"]
+    income = to_fils(transaction["income"])
+    expense = to_fils(transaction["expense"])
+    if income > 0:
+        add_budget_actual(state, "income", category, income)
+
+    if expense > 0:
+        add_budget_actual(state, "expenses", category, expense)
+
+    for column, add_amounts in link_functions.items():
+        if transaction.get(column):
+            add_amounts(state, transaction[column], income, expense)
+
+    state.cube.add(transaction["date"], category, transaction.get("event_id"),
+                   transaction.get("initiative_id"), income, expense)
+
+# Categories that take postings to a category the section does not have
+OTHER_CATEGORIES = {"income": "Other Income", "expenses": "Other Expenses"}
+
+def add_budget_actual(state, section, category, fils):
+    # The budget dict keeps the actual for backups; the variance table is
+    # updated in place along with it
+    if category not in state.budget[section]:
+        category = OTHER_CATEGORIES[section]
+    # Budget entries are replaced, never modified, so snapshots can share
+    # them
+    values = state.budget[section][category]
+    state.budget[section][category] = {**values, "actual": add_fils(values["actual"], fils)}
+    state.variance.add_actual(section, category, fils)
+
+# Actuals of the event and fundraising initiative a transaction is linked to
+# follow their transactions, so they never have to be summed from the ledger.
+# income and expense are in fils.
+def add_event_amounts(state, event_id, income, expense):
+    event = state.events.get(event_id)
+    if event is not None:
+        state.events.update(event_id, {
+            "actual_income": add_fils(event["actual_income"], income),
+            "actual_expenses": add_fils(event["actual_expenses"], expense)
+        })
+
+def add_initiative_amounts(state, initiative_id, income, expense):
+    initiative = state.fundraising.get(initiative_id)
+    if initiative is not None:
+        state.fundraising.update(initiative_id, {
+            "actual_raised": add_fils(initiative["actual_raised"], income),
+            "expenses": add_fils(initiative["expenses"], expense),
+            "net_proceeds": add_fils(initiative["net_proceeds"], income - expense)
+        })
+
+link_functions = {
+    "event_id": add_event_amounts,
+    "initiative_id": add_initiative_amounts
+}
+
+def apply_transactions(state, transactions):
+    # Bulk apply_transaction(): one ledger extend and one budget update per
+    # category (and linked event or initiative) instead of per row
+    frame = pd.DataFrame.from_records(transactions, columns=COLUMNS)
+    state.ledger.extend(frame)
+
+    # Amounts in fils, summed as int64
+    amounts = pd.DataFrame({
+        "category": frame["category"],
+        "income": to_fils_array(pd.to_numeric(frame["income"], errors="coerce")),
+        "expense": to_fils_array(pd.to_numeric(frame["expense"], errors="coerce"))
+    })
+    for section, column in [("income", "income"), ("expenses", "expense")]:
+        totals = amounts.groupby("category", sort=False)[column].sum()
+        for category, amount in totals[totals > 0].items():
+            add_budget_actual(state, section, category, int(amount))
+
+    for column, add_amounts in link_functions.items():
+        links = pd.to_numeric(frame[column], errors="coerce")
+        linked = links > 0
+        totals = amounts[linked].groupby(links[linked])[["income", "expense"]].sum()
+        for record_id, income, expense in totals.itertuples():
+            add_amounts(state, int(record_id), int(income), int(expense))
+
+    state.cube.add_frame(frame)
+
+def apply_event(state, event):
+    state.events.add(event)
+
+def apply_event_update(state, change):
+    state.events.update(change["id"], change["fields"])
+
+def apply_event_adjustment(state, change):
+    # Added to the actuals like a linked transaction, so postings made
+    # before or after are kept
+    add_event_amounts(state, change["id"], to_fils(change["income"]), to_fils(change["expenses"]))
+
+def apply_initiative(state, initiative):
+    state.fundraising.add(initiative)
+
+def apply_initiative_update(state, change):
+    state.fundraising.update(change["id"], change["fields"])
+
+def apply_budget(state, change):
+    section = state.budget[change["section"]]
+    # A sub-category's parents are added too, with nothing budgeted
+    for parent in ancestor_categories(change["category"]):
+        if parent not in section:
+            section[parent] = {"budget": 0, "actual": 0}
+    if change["category"] in section:
+        section[change["category"]] = {**section[change["category"]], "budget": change["budget"]}
+    else:
+        section[change["category"]] = {"budget": change["budget"], "actual": 0}
+    state.variance.set_budget(change["section"], change["category"], to_fils(change["budget"]))
+
+def apply_auth_rules(state, rules):
+    # Replaced as a whole, so a compiled engine can tell it is out of date
+    state.auth_rules = rules
+
+apply_functions = {
+    "transaction": apply_transaction,
+    "transactions": apply_transactions,
+    "event": apply_event,
+    "event_update": apply_event_update,
+    "event_adjustment": apply_event_adjustment,
+    "initiative": apply_initiative,
+    "initiative_update": apply_initiative_update,
+    "budget": apply_budget,
+    "auth_rules": apply_auth_rules
+}
+
+def touched_categories(state, op, data):
+    # (section, category) pairs whose actual or budget a change may move, for
+    # subscribers; None when the change can move any of them
+    if op == "budget":
+        return [(data["section"], data["category"])]
+    if op not in ("transaction", "transactions"):
+        return []
+    categories = {data["category"]} if op == "transaction" else {record["category"] for record in data}
+    # Each section posts to the category, or to its catch-all when the
+    # category is not in that section, as add_budget_actual() does
+    return sorted({(section, category if category in state.budget[section] else other)
+                   for category in categories
+                   for section, other in OTHER_CATEGORIES.items()})
+
+def import_state(state, data):
+    import_records(state, data)
+    rebuild_totals(state)
+
+def import_records(state, data):
+    # What a backup holds; data is what storage.read_backup() returns
+    state.budget = data.get("budget", state.budget)
+    if "ledger" in data:
+        state.ledger = data["ledger"]
+    elif "transactions" in data:
+        state.ledger = Ledger.from_records(data["transactions"])
+    if "events" in data:
+        state.events = Registry(data["events"])
+    if "fundraising" in data:
+        state.fundraising = Registry(data["fundraising"])
+    state.auth_rules = data.get("auth_rules", state.auth_rules)
+
+def rebuild_totals(state):
+    # The variance table from the budget, and the report cube from the
+    # ledger in one pass
+    state.variance = VarianceTable.from_budget(state.budget)
+    state.cube = Cube.from_ledger(state.ledger)
+
+def restore_state(state, snapshot, ops):
+    if snapshot:
+        import_state(state, snapshot)
+    for op, data in ops:
+        apply_functions[op](state, data)
+
+
+# What readers see: budget and the events and fundraising registries are
+# copies that share the entries and records (which are replaced, never
+# modified, when they change), the ledger is an immutable LedgerView,
+# auth_rules is only ever replaced whole and authorization is the
+# AuthorizationEngine compiled from it. cube and variance are copies of the
+# report cube and the budget variance table that share everything but what
+# changes. No copy grows with the ledger. version counts the changes
+# published so far, so anything derived from a snapshot can be cached on it.
+BookSnapshot = namedtuple("BookSnapshot", ["version", "budget", "ledger", "events", "fundraising",
+                                           "auth_rules", "authorization", "cube", "variance"])
+
+# What subscribers are told after each change: the op, the version it
+# produced, touched_categories() (None after a restore) and the change as it
+# was logged (None after a restore)
+BookEvent = namedtuple("BookEvent", ["op", "version", "touched", "data"])
+
+
+class Book:
+    # The committee's books, shared by every session in the process.
+    # Writers take the lock, apply and log a change, then publish a new
+    # snapshot. Readers only look at the latest published snapshot, so they
+    # never wait on the lock and never see a half-applied change.
+
+    def __init__(self, store):
+        self.store = store
+        self.lock = threading.Lock()
+        with self.lock:
+            self.budget = default_budget()
+            self.ledger = Ledger()
+            self.events = Registry()
+            self.fundraising = Registry()
+            self.auth_rules = default_auth_rules()
+            self.cube = Cube()
+            self.variance = VarianceTable.from_budget(self.budget)
+            self._authorization = None
+            self.version = 0
+            self._subscribers = []
+            restore_state(self, *store.load())
+            self._publish()
+
+    def _publish(self):
+        # The engine is only recompiled when a category was added or the
+        # rules were replaced
+        if self._authorization is None or not self._authorization.is_current(self.budget, self.auth_rules):
+            self._authorization = AuthorizationEngine(self.budget, self.auth_rules)
+        self._snapshot = BookSnapshot(
+            self.version,
+            {section: dict(categories) for section, categories in self.budget.items()},
+            self.ledger.view(),
+            self.events.copy(),
+            self.fundraising.copy(),
+            self.auth_rules,
+            self._authorization,
+            self.cube.copy(),
+            self.variance.copy()
+        )
+
+    def snapshot(self):
+        return self._snapshot
+
+    def subscribe(self, callback):
+        # callback(event, snapshot) is called after every change, in order,
+        # with the snapshot that change published. It runs while the lock is
+        # held, so it must be quick and must not change the books.
+        with self.lock:
+            self._subscribers.append(callback)
+
+    def _notify(self, event):
+        for callback in self._subscribers:
+            callback(event, self._snapshot)
+
+    def record(self, op, data):
+        # Apply one change and append it to the write-ahead log
+        with self.lock:
+            apply_functions[op](self, data)
+            due = self.store.append(op, data)
+            self.version += 1
+            self._publish()
+            if due:
+                # The snapshot just published is the logged state exactly
+                # and never changes, so it is written out in the background
+                self.store.compact(self._snapshot)
+            self._notify(BookEvent(op, self.version, touched_categories(self, op, data), data))
+
+    def restore(self, data):
+        # Replace the books (and what is stored on disk) with a backup
+        with self.lock:
+            previous = (self.budget, self.ledger, self.events, self.fundraising, self.auth_rules,
+                        self.cube, self.variance)
+            written = False
+            try:
+                import_records(self, data)
+                # The stored snapshot is written while the totals are
+                # rebuilt and is on disk before the restore is published
+                self.store.reset(self)
+                try:
+                    rebuild_totals(self)
+                finally:
+                    self.store.wait()
+                    written = True
+            except Exception:
+                # Keep the books as they were, on disk too
+                (self.budget, self.ledger, self.events, self.fundraising, self.auth_rules,
+                 self.cube, self.variance) = previous
+                if written:
+                    self.store.reset(self)
+                    self.store.wait()
+                raise
+            self.version += 1
+            self._publish()
+            self._notify(BookEvent("restore", self.version, None, None))
@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from ledger import NAT
+from money import FILS_PER_KD, to_fils_array
+
+# Dimensions of the report cube; a transaction falls in the month of its
+# posting date, and 0 stands for "no event" / "no initiative"
+CUBE_KEYS = ["year", "month", "category", "event_id", "initiative_id"]
+
+# Changed cells kept apart from the shared ones before they are folded in
+FOLD_MIN = 256
+
+
+class Cube:
+    # Income and expense sums per (year, month, category, event_id,
+    # initiative_id), in integer fils, kept up to date as transactions are
+    # applied. Reports slice and roll up these cells instead of scanning the
+    # ledger. Transactions without a posting date are left out.
+
+    # Copies share the cells: _base is a frame with one row per cell that is
+    # never modified once built, and what is added afterwards goes in
+    # _changes (key -> income and expense added), which is all a copy has to
+    # duplicate. Reports sum over both, so a cell may be in each. Once
+    # _changes outgrows the square root of the base it is folded into a new
+    # base, which keeps a copy O(sqrt(cells)).
+
+    def __init__(self, base=None):
+        self._base = base if base is not None else _cells_frame([], [], [], [], [], [], [])
+        self._changes = {}
+        self._frame = None
+
+    def __len__(self):
+        return len(self._folded())
+
+    def _add(self, key, income, expense):
+        old_income, old_expense = self._changes.get(key, (0, 0))
+        self._changes[key] = (old_income + income, old_expense + expense)
+
+    def add(self, date, category, event_id, initiative_id, income, expense):
+        # income and expense in fils
+        day = np.datetime64(date, "D")
+        if np.isnat(day):
+            return
+        day = day.item()
+        self._add((day.year, day.month, category, event_id or 0, initiative_id or 0), income, expense)
+        self._frame = None
+
+    def add_frame(self, frame):
+        # Bulk add(): one groupby over the transactions, then one update per
+        # cell they touch
+        for key, (income, expense) in _frame_cells(frame):
+            self._add(key, income, expense)
+        self._frame = None
+
+    @classmethod
+    def from_ledger(cls, ledger):
+        # Built as the shared base from the ledger's stored columns: each
+        # dated row gets one integer key for its cell, the rows are sorted by
+        # key and the amounts summed per run of equal keys, all in int64
+        months = ledger.column("date").astype("datetime64[M]").astype(np.int64)
+        dated = months != NAT
+        if not dated.any():
+            return cls()
+        months = months[dated]
+        first = int(months.min())
+        parts = [(months - first, None),
+                 (ledger.column("category")[dated], np.asarray(ledger.labels("category"), dtype=object))]
+        for name in ["event_id", "initiative_id"]:
+            parts.append(pd.factorize(ledger.column(name)[dated]))
+        key = np.zeros(len(months), dtype=np.int64)
+        for codes, _ in parts:
+            key = key * (int(codes.max()) + 1) + codes
+        order = np.argsort(key)
+        key = key[order]
+        runs = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        income = np.add.reduceat(ledger.column("income")[dated][order], runs)
+        expense = np.add.reduceat(ledger.column("expense")[dated][order], runs)
+
+        # Back from the cell keys to their dimensions, last one first
+        key = key[runs]
+        values = []
+        for codes, labels in reversed(parts):
+            key, code = np.divmod(key, int(codes.max()) + 1)
+            values.append(code if labels is None else labels[code])
+        initiative_ids, event_ids, categories, months = values
+        months = months + first
+        return cls(_cells_frame(months // 12 + 1970, months % 12 + 1, categories, event_ids, initiative_ids,
+                                income, expense))
+
+    def _changes_frame(self):
+        sums = np.array(list(self._changes.values()), dtype=np.int64)
+        return _cells_frame(*zip(*self._changes), sums[:, 0], sums[:, 1])
+
+    def _folded(self):
+        # One row per cell
+        if not self._changes:
+            return self._base
+        return self.frame().groupby(CUBE_KEYS, sort=False, as_index=False)[["income", "expense"]].sum()
+
+    def copy(self):
+        if len(self._changes) > max(FOLD_MIN, math.isqrt(len(self._base))):
+            self._base = self._folded()
+            self._changes = {}
+            self._frame = None
+        cube = Cube(self._base)
+        cube._changes = dict(self._changes)
+        cube._frame = self._frame
+        return cube
+
+    def frame(self):
+        # The base and the changes, built once per copy
+        if self._frame is None:
+            if self._changes:
+                self._frame = pd.concat([self._base, self._changes_frame()], ignore_index=True)
+            else:
+                self._frame = self._base
+        return self._frame
+
+    def sums(self, by, **filters):
+        # Income, expense and net in fils, summed over every dimension not in
+        # by, for the cells matching filters (dimension=value)
+        frame = self.frame()
+        for name, value in filters.items():
+            frame = frame[frame[name] == value]
+        sums = frame.groupby(by)[["income", "expense"]].sum()
+        return sums.assign(net=sums["income"] - sums["expense"])
+
+    def totals(self, by, **filters):
+        # sums() in KD
+        return self.sums(by, **filters) / FILS_PER_KD
+
+
+def _cells_frame(years, months, categories, event_ids, initiative_ids, income, expense):
+    return pd.DataFrame({
+        "year": np.asarray(years, dtype=np.int64),
+        "month": np.asarray(months, dtype=np.int64),
+        "category": np.asarray(categories, dtype=object),
+        "event_id": np.asarray(event_ids, dtype=np.int64),
+        "initiative_id": np.asarray(initiative_ids, dtype=np.int64),
+        "income": np.asarray(income, dtype=np.int64),
+        "expense": np.asarray(expense, dtype=np.int64)
+    })
+
+
+def _frame_cells(frame):
+    # (key, (income, expense)) of every cell the transactions touch, in fils
+    dates = frame["date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, errors="coerce", format="ISO8601")
+    dated = dates.notna().to_numpy()
+    if not dated.any():
+        return []
+    dates = dates[dated]
+    cells = pd.DataFrame({
+        "year": dates.dt.year.to_numpy(),
+        "month": dates.dt.month.to_numpy(),
+        "category": frame["category"][dated].to_numpy(),
+        "event_id": pd.to_numeric(frame["event_id"][dated], errors="coerce").fillna(0).to_numpy(dtype=np.int64),
+        "initiative_id": pd.to_numeric(frame["initiative_id"][dated], errors="coerce").fillna(0).to_numpy(dtype=np.int64),
+        "income": to_fils_array(pd.to_numeric(frame["income"][dated], errors="coerce")),
+        "expense": to_fils_array(pd.to_numeric(frame["expense"][dated], errors="coerce"))
+    })
+    sums = cells.groupby(CUBE_KEYS, sort=False)[["income", "expense"]].sum()
+    # Plain Python values from whole columns rather than row by row
+    keys = zip(*(sums.index.get_level_values(level).tolist() for level in range(len(CUBE_KEYS))))
+    return zip(keys, zip(sums["income"].tolist(), sums["expense"].tolist()))
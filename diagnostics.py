@@ -0,0 +1,191 @@
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+from collections import Counter, deque
+
+# Opt-in timings of where a rerun spends its time: whole page runs, the
+# finance helpers and the Streamlit calls that serialize tables and figures.
+# Everything is instrumented all the time, but while collection is off a
+# wrapper costs a single flag check. Collection starts off unless the
+# COMMITTEE_DIAGNOSTICS environment variable is set, and is switched in
+# Settings -> Diagnostics.
+
+# Timings kept per name; percentiles are over these most recent ones
+KEEP_TIMINGS = 500
+
+# Profiles kept for download
+KEEP_PROFILES = 5
+
+# Timing kinds, as shown in the panel
+PAGE = "page"
+HELPER = "helper"
+RENDER = "render"
+
+
+class Recorder:
+    # Process-wide store of timings and counters, shared by every session
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.timings = {}
+        self.kinds = {}
+        self.counters = Counter()
+        self.profiles = deque(maxlen=KEEP_PROFILES)
+        # Page whose next run is profiled, if any
+        self.profile_page = None
+
+    def add(self, name, kind, seconds):
+        with self.lock:
+            if name not in self.timings:
+                self.timings[name] = deque(maxlen=KEEP_TIMINGS)
+                self.kinds[name] = kind
+            self.timings[name].append(seconds)
+            self.counters[name] += 1
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def reset(self):
+        with self.lock:
+            self.timings.clear()
+            self.kinds.clear()
+            self.counters.clear()
+
+    def summary(self, kind=None):
+        # One row per timed name: calls, p50/p95/max and total of the kept
+        # timings, in milliseconds. NumPy and pandas are only loaded once the
+        # panel is shown, not when the app starts.
+        import numpy as np
+        import pandas as pd
+        with self.lock:
+            rows = [(name, self.kinds[name], self.counters[name], np.array(values) * 1000)
+                    for name, values in self.timings.items() if kind is None or self.kinds[name] == kind]
+        return pd.DataFrame(
+            [(name, kind, calls, float(np.percentile(ms, 50)), float(np.percentile(ms, 95)),
+              float(ms.max()), float(ms.sum())) for name, kind, calls, ms in rows],
+            columns=["name", "kind", "calls", "p50_ms", "p95_ms", "max_ms", "total_ms"]
+        ).sort_values("total_ms", ascending=False, ignore_index=True)
+
+    def counter_frame(self):
+        # Counters that are not just call counts of a timed name
+        import pandas as pd
+        with self.lock:
+            items = [(name, value) for name, value in self.counters.items() if name not in self.timings]
+        return pd.DataFrame(items, columns=["counter", "value"])
+
+
+recorder = Recorder(enabled=bool(os.environ.get("COMMITTEE_DIAGNOSTICS")))
+
+def set_enabled(enabled):
+    recorder.enabled = enabled
+
+def is_enabled():
+    return recorder.enabled
+
+
+class timed:
+    # Context manager timing a block under name while collection is on
+
+    def __init__(self, name, kind=HELPER):
+        self.name = name
+        self.kind = kind
+
+    def __enter__(self):
+        self.start = time.perf_counter() if recorder.enabled else None
+        return self
+
+    def __exit__(self, *exc):
+        if self.start is not None:
+            recorder.add(self.name, self.kind, time.perf_counter() - self.start)
+        return False
+
+def instrument(func=None, name=None, kind=HELPER):
+    # Decorator timing every call of func (as module.function by default)
+    if func is None:
+        return functools.partial(instrument, name=name, kind=kind)
+    name = name or f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not recorder.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            recorder.add(name, kind, time.perf_counter() - start)
+    return wrapper
+
+def run_page(page, show):
+    # Run a page's show(), timed as one page run, and profiled as well when
+    # a profile of this page was asked for
+    profile = None
+    if recorder.enabled and recorder.profile_page == page:
+        recorder.profile_page = None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already running in this process
+            profile = None
+    with timed(f"page.{page}", PAGE):
+        try:
+            show()
+        finally:
+            if profile is not None:
+                profile.disable()
+    if profile is not None:
+        _keep_profile(page, profile)
+
+def _keep_profile(page, profile):
+    text = io.StringIO()
+    stats = pstats.Stats(profile, stream=text)
+    stats.sort_stats("cumulative").print_stats(25)
+    recorder.profiles.appendleft({
+        "page": page,
+        "at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "seconds": stats.total_tt,
+        "summary": text.getvalue(),
+        # What Stats.dump_stats() would write to a .pstats file
+        "pstats": marshal.dumps(stats.stats)
+    })
+
+def install_streamlit_hooks(st):
+    # Time st.dataframe and st.plotly_chart (and the same calls on columns
+    # and other containers), which is where tables and figures are
+    # serialized, and count the rows sent. Safe to call on every rerun.
+    from streamlit.delta_generator import DeltaGenerator
+    if getattr(DeltaGenerator, "_diagnostics_installed", False):
+        return
+
+    def hook(method, name, data_position):
+        # data_position: where the data argument is (1 on the class, after
+        # self; 0 on the bound method)
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return method(*args, **kwargs)
+            if name == "st.dataframe":
+                data = args[data_position] if len(args) > data_position else kwargs.get("data")
+                if hasattr(data, "__len__"):
+                    recorder.count("st.dataframe rows", len(data))
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                recorder.add(name, RENDER, time.perf_counter() - start)
+        return wrapper
+
+    for method, name in [("dataframe", "st.dataframe"), ("plotly_chart", "st.plotly_chart")]:
+        setattr(DeltaGenerator, method, hook(getattr(DeltaGenerator, method), name, 1))
+        # st.dataframe is bound to the main container when Streamlit is
+        # imported, so it is wrapped separately
+        setattr(st, method, hook(getattr(st, method), name, 0))
+    DeltaGenerator._diagnostics_installed = True
@@ -0,0 +1,304 @@
+import datetime
+import os
+from decimal import Decimal
+
+import pandas as pd
+import streamlit as st
+
+from alerts import AlertMonitor
+from audit import AuditLog
+from book import Book
+from diagnostics import instrument
+from money import FILS_PER_KD, fils_to_float, kd_amount, round_kd, to_fils_array, to_kd
+from rules import validate_auth_rules
+from storage import Store
+
+# Shared helpers for every page: the books, the actions that change them and
+# the figures derived from them. Kept free of plotting and export libraries
+# so that importing it stays cheap.
+
+# Share of total income held back as the emergency reserve
+EMERGENCY_RESERVE_RATE = Decimal("0.15")
+
+# Where the persistent ledger (snapshot + write-ahead log) is kept
+DATA_DIR = os.environ.get("COMMITTEE_DATA_DIR",
+                          os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+
+# Committee members
+committee_members = {
+    "Chair": "TBD",
+    "Deputy Chair": "TBD",
+    "Treasurer": "Deema Abououf",
+    "Secretary": "TBD",
+    "Events Coordinator": "TBD"
+}
+
+# Helper functions
+# Totals are exact: Decimal KD from the ledger's running totals in fils
+@instrument
+def get_balance():
+    ledger = get_book().snapshot().ledger
+    return to_kd(ledger.income_fils - ledger.expense_fils)
+
+@instrument
+def get_emergency_reserve():
+    # 15% of total income, kept up to date by add_transaction()
+    return emergency_reserve(get_book().snapshot().ledger)
+
+def emergency_reserve(ledger):
+    return round_kd(to_kd(ledger.income_fils) * EMERGENCY_RESERVE_RATE)
+
+@instrument
+def get_required_authorization(amount, category):
+    # Looked up in the compiled rules: a hash lookup for the category and a
+    # binary search over the rule limits
+    return get_book().snapshot().authorization.required(amount, category)
+
+@instrument
+def check_authorization_batch(amounts, categories, authorizers):
+    # get_required_authorization() for whole Series at once: True where the
+    # authorizer may approve the row's amount and category
+    return get_book().snapshot().authorization.allowed_batch(amounts, categories, authorizers)
+
+def set_auth_rules(rules):
+    error = validate_auth_rules(rules)
+    if error:
+        return False, error
+    get_book().record("auth_rules", rules)
+    return True, "Authorization rules saved"
+
+@instrument
+def add_transaction(date, description, category, income=0, expense=0, authorized_by="", receipt_num="", notes="",
+                    event_id=None, initiative_id=None):
+    # Validate transaction
+    if not description or not category:
+        return False, "Description and category are required"
+    
+    # Check authorization based on amount
+    amount = max(income, expense)
+    required_auth = get_required_authorization(amount, category)
+    if authorized_by not in required_auth and "Committee Vote" not in required_auth:
+        return False, f"This transaction requires authorization from: {', '.join(required_auth)}"
+    
+    # Add transaction
+    transaction = {
+        "date": date,
+        "description": description,
+        "category": category,
+        "income": kd_amount(income),
+        "expense": kd_amount(expense),
+        "authorized_by": authorized_by,
+        "receipt_num": receipt_num,
+        "notes": notes,
+        "timestamp": datetime.datetime.now().isoformat(),
+        # Linked event and initiative actuals are updated with the transaction
+        "event_id": event_id,
+        "initiative_id": initiative_id
+    }
+    get_book().record("transaction", transaction)
+    
+    return True, "Transaction added successfully"
+
+@instrument
+def add_transactions(transactions):
+    # Bulk add_transaction() for rows that have already been validated,
+    # stored as a single change. Amounts are rounded to whole fils as in
+    # add_transaction().
+    records = transactions.assign(
+        income=fils_to_float(to_fils_array(transactions["income"])),
+        expense=fils_to_float(to_fils_array(transactions["expense"])),
+        timestamp=datetime.datetime.now().isoformat())
+    get_book().record("transactions", records.to_dict("records"))
+    
+    return True, f"Imported {len(records)} transactions"
+
+@instrument
+def generate_monthly_report(month=None, year=None, by="timestamp", snapshot=None):
+    # by: "timestamp" buckets transactions by when they were entered,
+    # "date" by their posting date. snapshot defaults to the latest one.
+    now = datetime.datetime.now()
+    month = month or now.month
+    year = year or now.year
+    
+    # Look up the month's rows in the ledger's month index
+    ledger = (snapshot or get_book().snapshot()).ledger
+    rows = ledger.month_rows(year, month, by=by)
+    monthly_transactions = ledger.frame().iloc[rows]
+    
+    monthly_income = to_kd(ledger.amount_sum("income", rows))
+    monthly_expenses = to_kd(ledger.amount_sum("expense", rows))
+    balance = to_kd(ledger.income_fils - ledger.expense_fils)
+    reserve = emergency_reserve(ledger)
+    
+    report = {
+        "month": month,
+        "year": year,
+        "total_income": monthly_income,
+        "total_expenses": monthly_expenses,
+        "net": monthly_income - monthly_expenses,
+        "transactions": monthly_transactions,
+        "current_balance": balance,
+        "emergency_reserve": reserve,
+        "available_funds": balance - reserve
+    }
+    
+    return report
+
+# The other reports are roll-ups of the report cube (sums per month,
+# category, event and initiative by posting date), not ledger scans
+@instrument
+def generate_ytd_report(year):
+    cube = get_book().snapshot().cube
+    monthly = cube.sums("month", year=year).reindex(range(1, 13), fill_value=0)
+    by_category = cube.totals("category", year=year).sort_values("expense", ascending=False)
+    return {
+        "year": year,
+        "total_income": to_kd(monthly["income"].sum()),
+        "total_expenses": to_kd(monthly["expense"].sum()),
+        "net": to_kd(monthly["net"].sum()),
+        "monthly": (monthly / FILS_PER_KD).set_axis(MONTH_NAMES).rename_axis("month"),
+        "categories": by_category
+    }
+
+@instrument
+def generate_event_report():
+    # Actuals are the events' own figures: their linked transactions plus
+    # any adjustments entered by hand
+    snapshot = get_book().snapshot()
+    events = pd.DataFrame(snapshot.events.records(),
+                          columns=["id", "name", "date", "status", "projected_income", "projected_expenses",
+                                   "actual_income", "actual_expenses"])
+    actual_income = events.pop("actual_income").fillna(0.0)
+    actual_expenses = events.pop("actual_expenses").fillna(0.0)
+    return events.assign(
+        projected_net=events["projected_income"] - events["projected_expenses"],
+        actual_income=actual_income,
+        actual_expenses=actual_expenses,
+        actual_net=fils_to_float(to_fils_array(actual_income) - to_fils_array(actual_expenses))
+    ).assign(variance=lambda df: df["actual_net"] - df["projected_net"])
+
+@instrument
+def generate_fundraising_report():
+    # The initiatives' own figures, as their linked transactions keep them
+    snapshot = get_book().snapshot()
+    initiatives = pd.DataFrame(snapshot.fundraising.records(),
+                               columns=["id", "name", "dates", "status", "goal_amount", "actual_raised", "expenses"])
+    raised = initiatives.pop("actual_raised").fillna(0.0)
+    expenses = initiatives.pop("expenses").fillna(0.0)
+    goal = initiatives["goal_amount"].where(initiatives["goal_amount"] > 0)
+    return initiatives.assign(
+        raised=raised,
+        expenses=expenses,
+        net_proceeds=fils_to_float(to_fils_array(raised) - to_fils_array(expenses)),
+        percent_of_goal=raised / goal * 100
+    )
+
+def create_event_budget(event_name, date, location, coordinator, projected_income=0, projected_expenses=0):
+    event = {
+        "name": event_name,
+        "date": date,
+        "location": location,
+        "coordinator": coordinator,
+        "projected_income": kd_amount(projected_income),
+        "projected_expenses": kd_amount(projected_expenses),
+        "actual_income": 0,
+        "actual_expenses": 0,
+        "income_sources": [],
+        "expense_items": [],
+        "status": "Planning"  # Planning, Active, Completed
+    }
+    
+    get_book().record("event", event)
+    return True, "Event budget created successfully"
+
+def update_event(event_id, **fields):
+    get_book().record("event_update", {"id": event_id, "fields": fields})
+
+def adjust_event_actuals(event_id, income, expenses):
+    # Amounts (KD, may be negative) added to an event's actual figures on
+    # top of its linked transactions, e.g. takings that were never posted
+    get_book().record("event_adjustment", {"id": event_id, "income": kd_amount(income),
+                                           "expenses": kd_amount(expenses)})
+
+def add_fundraising_initiative(name, dates, coordinator, goal_amount):
+    initiative = {
+        "name": name,
+        "dates": dates,
+        "coordinator": coordinator,
+        "goal_amount": kd_amount(goal_amount),
+        "actual_raised": 0,
+        "expenses": 0,
+        "net_proceeds": 0,
+        "status": "Planning"  # Planning, Active, Completed
+    }
+    
+    get_book().record("initiative", initiative)
+    return True, "Fundraising initiative added successfully"
+
+def update_initiative(initiative_id, **fields):
+    get_book().record("initiative_update", {"id": initiative_id, "fields": fields})
+
+def record_label(registry, record_id, detail):
+    # Name of an event or initiative, with its date when the name is shared
+    record = registry.get(record_id)
+    if len(registry.find(record["name"])) > 1:
+        return f"{record['name']} ({record.get(detail, '')})"
+    return record["name"]
+
+def set_category_budget(section, category, amount):
+    # Adds the category if it does not exist yet
+    get_book().record("budget", {"section": section, "category": category, "budget": kd_amount(amount)})
+
+# The books are shared by every session in this process
+@st.cache_resource
+def get_book():
+    book = Book(Store(DATA_DIR))
+    # Every change is audited, from the first one
+    get_audit_log().watch(book)
+    return book
+
+# Hash-chained audit trail of every change, in the data directory
+@st.cache_resource
+def get_audit_log():
+    return AuditLog(DATA_DIR)
+
+# Threshold alerts on the books, raised as changes are recorded and logged in
+# the data directory
+@st.cache_resource
+def get_alert_monitor():
+    return AlertMonitor(get_book(), os.path.join(DATA_DIR, "alerts.log"), EMERGENCY_RESERVE_RATE)
+
+# Budget against actual comes from the snapshot's variance table, which the
+# book keeps up to date as postings and budget edits are applied
+def months_covered(ledger):
+    # Months from the first posting date to this month, for burn rates
+    months = ledger.months(by="date")
+    if not months:
+        return 1
+    year, month = months[0]
+    today = datetime.date.today()
+    return max(1, (today.year - year) * 12 + today.month - month + 1)
+
+@instrument
+def budget_table(section, snapshot=None):
+    # Budget, Actual, Variance, % of Budget and Burn Rate (KD per month) per
+    # category
+    snapshot = snapshot or get_book().snapshot()
+    return snapshot.variance.frame(section, months_covered(snapshot.ledger))
+
+@instrument
+def budget_subtree_table(section, category=None, snapshot=None):
+    # Drill-down: the categories directly under category (the top level if
+    # None) with the totals of their subtrees
+    snapshot = snapshot or get_book().snapshot()
+    return snapshot.variance.subtree_frame(section, category, months_covered(snapshot.ledger))
+
+def budget_totals(snapshot=None):
+    # (income budget, income actual, expense budget, expense actual), exact
+    variance = (snapshot or get_book().snapshot()).variance
+    return (*variance.totals("income"), *variance.totals("expenses"))
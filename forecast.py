@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Cash-flow forecast over a grid of future months. Every input is turned into
+# one array per flow with a value per month, so the projection and the Monte
+# Carlo scenarios are plain NumPy arithmetic over (paths, months) arrays.
+
+# Month-to-month volatility used until there is enough history to estimate it
+DEFAULT_VOLATILITY = 0.25
+
+# Spread of planned event and fundraising amounts around their projections
+PLANNED_INCOME_SPREAD = 0.2
+PLANNED_EXPENSE_SPREAD = 0.1
+
+def month_grid(start, months):
+    # start: any date in the first month of the forecast
+    first = np.datetime64(start, "M")
+    return first + np.arange(months)
+
+def seasonal_baseline(history, grid):
+    # Average income and expense of each calendar month in history (a
+    # DataFrame with "year", "month", "income" and "expense" columns, one row
+    # per month), laid out over the grid. Months never seen count as zero.
+    income = np.zeros(12)
+    expense = np.zeros(12)
+    if len(history):
+        means = history.groupby("month")[["income", "expense"]].mean()
+        income[means.index.to_numpy() - 1] = means["income"].to_numpy()
+        expense[means.index.to_numpy() - 1] = means["expense"].to_numpy()
+    calendar_months = grid.astype(np.int64) % 12
+    return income[calendar_months], expense[calendar_months]
+
+def estimate_volatility(history):
+    # Spread of monthly income around its calendar-month mean, on a log
+    # scale; needs a year of history
+    if len(history) < 12:
+        return DEFAULT_VOLATILITY
+    income = history["income"].to_numpy(dtype=float)
+    means = history.groupby("month")["income"].transform("mean").to_numpy(dtype=float)
+    seen = (income > 0) & (means > 0)
+    if seen.sum() < 6:
+        return DEFAULT_VOLATILITY
+    return float(np.clip(np.std(np.log(income[seen] / means[seen])), 0.05, 1.0))
+
+def planned_flows(dates, amounts, grid):
+    # Sum amounts into the grid month of their date. Undated amounts fall in
+    # the first month; amounts dated outside the grid are left out. Only ISO
+    # dates count: free text such as "Apr 15-20" is taken as undated rather
+    # than guessed at.
+    flows = np.zeros(len(grid))
+    if not len(amounts):
+        return flows
+    months = pd.to_datetime(pd.Series(dates, dtype=object), errors="coerce",
+                            format="ISO8601").to_numpy().astype("datetime64[M]")
+    positions = (months - grid[0]).astype(np.int64)
+    positions[np.isnat(months)] = 0
+    inside = (positions >= 0) & (positions < len(grid))
+    np.add.at(flows, positions[inside], np.asarray(amounts, dtype=float)[inside])
+    return flows
+
+def project(balance, total_income, income, expense, reserve_rate):
+    # Deterministic balance and reserve at the end of each month. The reserve
+    # is a share of all income to date, as in the app.
+    balances = balance + np.cumsum(income - expense, axis=-1)
+    reserves = (total_income + np.cumsum(income, axis=-1)) * reserve_rate
+    return balances, reserves
+
+def simulate(balance, total_income, base_income, base_expense, planned_income, planned_expense,
+             reserve_rate, volatility=DEFAULT_VOLATILITY, paths=10000, seed=0):
+    # Monte Carlo scenarios: baseline flows get lognormal month-by-month
+    # shocks (mean 1), planned amounts a normal spread around their
+    # projection. Returns (paths, months) arrays of balances and reserves.
+    rng = np.random.default_rng(seed)
+    shape = (paths, len(base_income))
+    mu = -volatility ** 2 / 2
+    income = (base_income * rng.lognormal(mu, volatility, shape)
+              + planned_income * np.maximum(rng.normal(1.0, PLANNED_INCOME_SPREAD, shape), 0))
+    expense = (base_expense * rng.lognormal(mu, volatility, shape)
+               + planned_expense * np.maximum(rng.normal(1.0, PLANNED_EXPENSE_SPREAD, shape), 0))
+    return project(balance, total_income, income, expense, reserve_rate)
+
+def forecast(balance, total_income, history, events, initiatives, start, months=12,
+             reserve_rate=0.15, paths=10000, seed=0):
+    # Full forecast from the current totals, the monthly history of unlinked
+    # transactions, and the events and initiatives still to come (as dicts).
+    # Returns a DataFrame per month: expected balance and reserve, balance
+    # percentiles over the scenarios and the probability of ending the month
+    # below the reserve.
+    grid = month_grid(start, months)
+    base_income, base_expense = seasonal_baseline(history, grid)
+
+    # Only what is still to come: actuals are already in the balance
+    upcoming = [event for event in events if event.get("status") != "Completed"]
+    planned_income = planned_flows(
+        [event["date"] for event in upcoming],
+        [max(event["projected_income"] - event.get("actual_income", 0), 0) for event in upcoming], grid)
+    planned_expense = planned_flows(
+        [event["date"] for event in upcoming],
+        [max(event["projected_expenses"] - event.get("actual_expenses", 0), 0) for event in upcoming], grid)
+    open_initiatives = [initiative for initiative in initiatives if initiative.get("status") != "Completed"]
+    planned_income += planned_flows(
+        [initiative.get("dates") for initiative in open_initiatives],
+        [max(initiative["goal_amount"] - initiative.get("actual_raised", 0), 0) for initiative in open_initiatives],
+        grid)
+
+    expected_balance, expected_reserve = project(balance, total_income, base_income + planned_income,
+                                                 base_expense + planned_expense, reserve_rate)
+    balances, reserves = simulate(balance, total_income, base_income, base_expense, planned_income,
+                                  planned_expense, reserve_rate, estimate_volatility(history), paths, seed)
+    low, median, high = np.percentile(balances, [10, 50, 90], axis=0)
+    return pd.DataFrame({
+        "month": grid.astype("datetime64[ns]"),
+        "expected_balance": expected_balance,
+        "expected_reserve": expected_reserve,
+        "balance_p10": low,
+        "balance_p50": median,
+        "balance_p90": high,
+        "shortfall_probability": (balances < reserves).mean(axis=0)
+    })
@@ -0,0 +1,24 @@
+import streamlit as st
+
+# Display formats for tables. Amounts stay numeric in the DataFrames (so they
+# sort as numbers) and are formatted by the browser through column_config.
+CURRENCY_FORMAT = "KD %.2f"
+PERCENT_FORMAT = "%.1f%%"
+
+# Show the date column without a time part
+DATE_COLUMN_CONFIG = {"date": st.column_config.DateColumn("date", format="YYYY-MM-DD")}
+
+def currency_config(*columns):
+    return {column: st.column_config.NumberColumn(column, format=CURRENCY_FORMAT) for column in columns}
+
+def percent_config(*columns):
+    return {column: st.column_config.NumberColumn(column, format=PERCENT_FORMAT) for column in columns}
+
+def transaction_config():
+    # column_config for ledger tables (date, income and expense columns)
+    return {**DATE_COLUMN_CONFIG, **currency_config("income", "expense")}
+
+def blank_zero_amounts(frame, columns=("income", "expense")):
+    # A transaction is either income or expense; the other amount is shown
+    # as an empty cell instead of KD 0.00
+    return frame.assign(**{column: frame[column].where(frame[column] > 0) for column in columns})
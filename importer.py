@@ -0,0 +1,100 @@
+import pandas as pd
+
+from money import fils_to_float, to_fils_array
+
+# Transaction fields a statement column can be mapped to. "amount" is a
+# single signed column (positive = income, negative = expense), as most bank
+# exports have; otherwise income and expense come from separate columns.
+IMPORT_FIELDS = ["date", "description", "category", "amount", "income", "expense",
+                 "authorized_by", "receipt_num", "notes"]
+
+# Column names that are mapped to a field automatically
+FIELD_ALIASES = {
+    "date": ["date", "posting date", "transaction date", "value date"],
+    "description": ["description", "details", "narrative", "memo"],
+    "category": ["category"],
+    "amount": ["amount", "value"],
+    "income": ["income", "credit", "deposit", "money in"],
+    "expense": ["expense", "debit", "withdrawal", "money out"],
+    "authorized_by": ["authorized by", "authorized_by", "approved by"],
+    "receipt_num": ["receipt", "receipt #", "receipt_num", "reference"],
+    "notes": ["notes", "note", "comment"]
+}
+
+def read_statement(f):
+    # Every column as text; amounts and dates are parsed during validation
+    return pd.read_csv(f, dtype=str, keep_default_na=False, skipinitialspace=True)
+
+def guess_mapping(columns):
+    # field -> statement column, for the columns whose names we recognise
+    mapping = {}
+    lowered = {column.strip().lower(): column for column in columns}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            if alias in lowered:
+                mapping[field] = lowered[alias]
+                break
+    return mapping
+
+def parse_amounts(values):
+    # "1,234.50", "KD 12.5" and "(12.00)" style amounts; anything else is NaN
+    text = values.astype(str).str.strip()
+    negative = text.str.startswith("(") & text.str.endswith(")")
+    amounts = pd.to_numeric(text.str.replace(r"[^0-9.\-]", "", regex=True), errors="coerce")
+    amounts = amounts.where(~negative, -amounts)
+    # Empty cells mean no amount; the rest are rounded to whole fils, as
+    # they are stored
+    amounts = amounts.where(text != "", 0.0)
+    return pd.Series(fils_to_float(to_fils_array(amounts)), index=amounts.index).where(amounts.notna())
+
+def prepare_import(statement, mapping, defaults, categories, dayfirst=False):
+    # Turn a statement into transaction rows (as in ledger.COLUMNS, without
+    # the timestamp and links) plus one error message per row ("" when the
+    # row is valid). mapping is field -> statement column; defaults fill the
+    # text fields that are not mapped, or blank. categories are the budget
+    # categories a row may name.
+    def column(field):
+        default = defaults.get(field, "")
+        if field in mapping:
+            values = statement[mapping[field]].astype(str).str.strip()
+            return values.where(values != "", default)
+        return pd.Series(default, index=statement.index, dtype=object)
+
+    if "amount" in mapping:
+        amount = parse_amounts(statement[mapping["amount"]])
+        income = amount.clip(lower=0)
+        expense = (-amount).clip(lower=0)
+        negative = pd.Series(False, index=statement.index)
+    else:
+        income = parse_amounts(column("income")) if "income" in mapping else pd.Series(0.0, index=statement.index)
+        expense = parse_amounts(column("expense")) if "expense" in mapping else pd.Series(0.0, index=statement.index)
+        negative = (income < 0) | (expense < 0)
+
+    dates = pd.to_datetime(column("date"), errors="coerce", dayfirst=dayfirst)
+    transactions = pd.DataFrame({
+        "date": dates.dt.strftime("%Y-%m-%d"),
+        "description": column("description"),
+        "category": column("category"),
+        "income": income,
+        "expense": expense,
+        "authorized_by": column("authorized_by"),
+        "receipt_num": column("receipt_num"),
+        "notes": column("notes")
+    })
+
+    problems = pd.DataFrame({
+        "missing description": transactions["description"] == "",
+        "missing category": transactions["category"] == "",
+        "unknown category": (transactions["category"] != "") & ~transactions["category"].isin(categories),
+        "invalid date": dates.isna(),
+        "invalid amount": income.isna() | expense.isna(),
+        "negative amount": negative,
+        "no amount": (income == 0) & (expense == 0)
+    })
+    return transactions, row_errors(problems)
+
+def row_errors(problems):
+    # Join the names of the failed checks of each row, e.g.
+    # "invalid date; no amount"
+    messages = problems.dot(pd.Index(problems.columns) + "; ")
+    return messages.str.rstrip("; ")
@@ -0,0 +1,390 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from money import fils_to_float, to_fils, to_fils_array
+
+# Transaction columns, in display and backup order
+COLUMNS = ["date", "description", "category", "income", "expense",
+           "authorized_by", "receipt_num", "notes", "timestamp",
+           "event_id", "initiative_id"]
+
+AMOUNT_COLUMNS = ["income", "expense"]
+TIME_COLUMNS = ["date", "timestamp"]
+CODED_COLUMNS = ["category", "authorized_by"]
+TEXT_COLUMNS = ["description", "receipt_num", "notes"]
+# Optional links to an event and a fundraising initiative by registry ID
+LINK_COLUMNS = ["event_id", "initiative_id"]
+
+# Link value of a transaction that is not linked (registry IDs start at 1)
+NO_LINK = 0
+
+# Columns a transaction can be bucketed by month on: the entry timestamp or
+# the posting date
+MONTH_BASES = ["timestamp", "date"]
+
+# Integer value of NaT in datetime64 arrays
+NAT = np.iinfo(np.int64).min
+
+_DTYPES = {
+    "date": "datetime64[ns]",
+    "timestamp": "datetime64[ns]",
+    # Amounts are kept in integer fils
+    "income": np.int64,
+    "expense": np.int64,
+    "category": np.int32,
+    "authorized_by": np.int32,
+    "description": object,
+    "receipt_num": object,
+    "notes": object,
+    "event_id": np.int64,
+    "initiative_id": np.int64
+}
+
+
+class Ledger:
+    # Append-only columnar transaction store. Every column is a preallocated
+    # NumPy array that doubles in size when full. Category and authorizer are
+    # stored as integer codes into a list of labels, so the DataFrame handed
+    # out by frame() is built from views of the arrays and never copies them.
+    #
+    # For each month basis the ledger also keeps a (year, month) -> row runs
+    # index: two lists holding the starts and stops of [start, stop) ranges.
+    # The last stop is extended in place while rows for the same month keep
+    # arriving back to back; otherwise both lists are only appended to, so
+    # views can share them and clip them at their own length.
+    #
+    # All reads go through view(), an immutable LedgerView of the rows written
+    # so far, so readers never see a half-finished append.
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._columns = {name: np.empty(capacity, dtype=_DTYPES[name]) for name in COLUMNS}
+        self._labels = {name: [] for name in CODED_COLUMNS}
+        self._codes = {name: {} for name in CODED_COLUMNS}
+        self._months = {basis: {} for basis in MONTH_BASES}
+        self._view = None
+        # Running totals, in fils
+        self.income_fils = 0
+        self.expense_fils = 0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, extra):
+        needed = self._size + extra
+        capacity = len(self._columns["income"])
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self._columns.items():
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+
+    def _code(self, column, label):
+        codes = self._codes[column]
+        code = codes.get(label)
+        if code is None:
+            code = len(self._labels[column])
+            self._labels[column].append(label)
+            codes[label] = code
+        return code
+
+    def _index_months(self, start, stop):
+        for basis in MONTH_BASES:
+            months = self._columns[basis][start:stop].astype("datetime64[M]").astype(np.int64)
+            # Split the new rows into runs of consecutive rows in the same
+            # month, then file the runs under their month
+            breaks = np.flatnonzero(months[1:] != months[:-1]) + 1
+            run_starts = np.concatenate(([0], breaks))
+            run_stops = np.concatenate((breaks, [len(months)]))
+            run_months = months[run_starts]
+            order = np.argsort(run_months, kind="stable")
+            keys, firsts = np.unique(run_months[order], return_index=True)
+            index = self._months[basis]
+            for month, group in zip(keys.tolist(), np.split(order, firsts[1:])):
+                if month == NAT:
+                    # Rows without a date are not indexed
+                    continue
+                starts = (run_starts[group] + start).tolist()
+                stops = (run_stops[group] + start).tolist()
+                key = (1970 + month // 12, month % 12 + 1)
+                # Views read the index without a lock: a new month is added
+                # with its runs in a single assignment, and stops are extended
+                # before starts, since readers count runs by their starts
+                if key not in index:
+                    index[key] = (starts, stops)
+                    continue
+                key_starts, key_stops = index[key]
+                if key_stops[-1] == starts[0]:
+                    key_stops[-1] = stops[0]
+                    starts, stops = starts[1:], stops[1:]
+                key_stops.extend(stops)
+                key_starts.extend(starts)
+
+    def append(self, date, description, category, income, expense,
+               authorized_by, receipt_num, notes, timestamp, event_id=None, initiative_id=None):
+        self._grow(1)
+        i = self._size
+        columns = self._columns
+        columns["date"][i] = np.datetime64(date, "ns")
+        columns["timestamp"][i] = np.datetime64(timestamp, "ns")
+        income = to_fils(income)
+        expense = to_fils(expense)
+        columns["income"][i] = income
+        columns["expense"][i] = expense
+        columns["category"][i] = self._code("category", category)
+        columns["authorized_by"][i] = self._code("authorized_by", authorized_by)
+        columns["description"][i] = description
+        columns["receipt_num"][i] = receipt_num
+        columns["notes"][i] = notes
+        columns["event_id"][i] = event_id or NO_LINK
+        columns["initiative_id"][i] = initiative_id or NO_LINK
+        self._size = i + 1
+        self._index_months(i, i + 1)
+        self._view = None
+        self.income_fils += income
+        self.expense_fils += expense
+
+    def extend(self, frame, in_fils=False):
+        # Append a whole DataFrame of transactions (columns as in COLUMNS)
+        # in one vectorized pass. in_fils: the amounts are already integer
+        # fils rather than KD.
+        count = len(frame)
+        if not count:
+            return
+        self._grow(count)
+        start, stop = self._size, self._size + count
+        columns = self._columns
+        for name in TIME_COLUMNS:
+            values = frame[name]
+            if not pd.api.types.is_datetime64_any_dtype(values):
+                values = pd.to_datetime(values, errors="coerce", format="ISO8601")
+            columns[name][start:stop] = values.to_numpy(dtype="datetime64[ns]")
+        for name in AMOUNT_COLUMNS:
+            if in_fils:
+                columns[name][start:stop] = frame[name].to_numpy(dtype=np.int64)
+            else:
+                columns[name][start:stop] = to_fils_array(pd.to_numeric(frame[name], errors="coerce"))
+        for name in CODED_COLUMNS:
+            values = frame[name]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, labels = values.cat.codes.to_numpy(), values.cat.categories
+            else:
+                codes, labels = pd.factorize(values.fillna("").astype(str))
+            mapping = [self._code(name, str(label)) for label in labels]
+            if (codes < 0).any():
+                # Missing values have code -1, which picks a trailing "" label
+                mapping.append(self._code(name, ""))
+            columns[name][start:stop] = np.array(mapping, dtype=np.int32)[codes]
+        for name in TEXT_COLUMNS:
+            values = frame[name].to_numpy(dtype=object)
+            # Converted only when something is missing or not a string
+            if pd.api.types.infer_dtype(values, skipna=False) != "string":
+                values = frame[name].fillna("").astype(str).to_numpy(dtype=object)
+            columns[name][start:stop] = values
+        for name in LINK_COLUMNS:
+            # Older backups have no link columns
+            if name in frame:
+                columns[name][start:stop] = pd.to_numeric(frame[name], errors="coerce").fillna(NO_LINK).to_numpy(dtype=np.int64)
+            else:
+                columns[name][start:stop] = NO_LINK
+        self._size = stop
+        self._index_months(start, stop)
+        self._view = None
+        self.income_fils += int(columns["income"][start:stop].sum())
+        self.expense_fils += int(columns["expense"][start:stop].sum())
+
+    @classmethod
+    def from_frame(cls, frame, in_fils=False):
+        # Build a ledger from a DataFrame that is already in entry order
+        ledger = cls(capacity=max(1024, len(frame)))
+        ledger.extend(frame, in_fils)
+        return ledger
+
+    @classmethod
+    def from_records(cls, records):
+        # Build a ledger from a list of transaction dicts (the JSON backup
+        # format), kept in entry order
+        if not records:
+            return cls()
+        frame = pd.DataFrame.from_records(records, columns=COLUMNS)
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce", format="ISO8601")
+        return cls.from_frame(frame.sort_values(by="timestamp", kind="stable"))
+
+    def view(self):
+        # Cached until the next append
+        if self._view is None:
+            n = self._size
+            self._view = LedgerView(
+                {name: column[:n] for name, column in self._columns.items()},
+                {name: list(labels) for name, labels in self._labels.items()},
+                self._months,
+                self.income_fils,
+                self.expense_fils
+            )
+        return self._view
+
+    def iter_records(self, chunk_size=10000):
+        return self.view().iter_records(chunk_size)
+
+    def to_records(self):
+        return self.view().to_records()
+
+    def frame(self):
+        return self.view().frame()
+
+    def labels(self, name):
+        return self.view().labels(name)
+
+    def column(self, name):
+        return self.view().column(name)
+
+
+class LedgerView:
+    # Read-only view of the rows a Ledger held when the view was taken.
+    # Written rows are never modified and growing the ledger allocates new
+    # arrays, so a view stays consistent while the ledger keeps taking appends.
+
+    def __init__(self, columns, labels, months, income_fils, expense_fils):
+        self._columns = columns
+        self._labels = labels
+        self._months = months
+        self._frame = None
+        self.income_fils = income_fils
+        self.expense_fils = expense_fils
+
+    def __len__(self):
+        return len(self._columns["income"])
+
+    def months(self, by="timestamp"):
+        # (year, month) pairs that have at least one transaction
+        size = len(self)
+        return sorted(key for key, (starts, _) in list(self._months[by].items()) if starts and starts[0] < size)
+
+    def month_rows(self, year, month, by="timestamp"):
+        # Positions of the rows in one month, as a slice when they are
+        # contiguous (the usual case for entry timestamps). The index is
+        # shared with the ledger, so runs past the end of the view are cut.
+        size = len(self)
+        starts, stops = self._months[by].get((year, month), ([], []))
+        count = bisect.bisect_left(starts, size)
+        if not count:
+            return slice(0, 0)
+        if count == 1:
+            return slice(starts[0], min(stops[0], size))
+        starts = np.array(starts[:count])
+        stops = np.minimum(np.array(stops[:count]), size)
+        lengths = stops - starts
+        # Row = position in the output + (run start - output offset of the run)
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def select(self, start=None, end=None, categories=None, authorizers=None,
+               min_amount=None, max_amount=None, by="date"):
+        # Positions (in entry order) of the rows that pass every filter given.
+        # A date range (inclusive, either end optional) is first narrowed to
+        # the rows of the months it spans through the month index; the other
+        # filters are vectorized checks on the codes and amounts of only
+        # those rows. The amount of a row (in KD) is its income or expense.
+        columns = self._columns
+        if start is None and end is None:
+            rows = np.arange(len(self))
+        else:
+            first = (start.year, start.month) if start is not None else (0, 0)
+            last = (end.year, end.month) if end is not None else (10000, 0)
+            parts = []
+            for year, month in self.months(by):
+                if first <= (year, month) <= last:
+                    month_rows = self.month_rows(year, month, by)
+                    if isinstance(month_rows, slice):
+                        month_rows = np.arange(month_rows.start, month_rows.stop)
+                    parts.append(month_rows)
+            rows = np.sort(np.concatenate(parts)) if parts else np.arange(0)
+            dates = columns[by][rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if start is not None:
+                keep &= dates >= np.datetime64(start, "D")
+            if end is not None:
+                keep &= dates < np.datetime64(end, "D") + np.timedelta64(1, "D")
+            rows = rows[keep]
+
+        for name, selected in [("category", categories), ("authorized_by", authorizers)]:
+            if selected:
+                codes = {label: code for code, label in enumerate(self._labels[name])}
+                wanted = [codes[label] for label in selected if label in codes]
+                rows = rows[np.isin(columns[name][rows], wanted)]
+
+        if min_amount is not None or max_amount is not None:
+            amounts = np.maximum(columns["income"][rows], columns["expense"][rows])
+            keep = np.ones(len(rows), dtype=bool)
+            if min_amount is not None:
+                keep &= amounts >= to_fils(min_amount)
+            if max_amount is not None:
+                keep &= amounts <= to_fils(max_amount)
+            rows = rows[keep]
+        return rows
+
+    def amount_sum(self, name, rows=slice(None)):
+        # Exact sum in fils of an amount column over rows (a slice or
+        # positions), as the int64 sum of the column
+        return int(self._columns[name][rows].sum())
+
+    def labels(self, name):
+        # Distinct values of a coded column, in order of first use
+        return list(self._labels[name])
+
+    def column(self, name):
+        # A column's array as stored: amounts in fils, category and
+        # authorizer as codes into labels(name), NO_LINK for no link. Shared
+        # with the ledger, so it must not be modified.
+        return self._columns[name]
+
+    def iter_records(self, chunk_size=10000):
+        # Transactions as dicts in the JSON backup layout, converted one chunk
+        # of rows at a time
+        columns = self._columns
+        for start in range(0, len(self), chunk_size):
+            stop = start + chunk_size
+            values = {
+                "date": np.datetime_as_string(columns["date"][start:stop], unit="D").tolist(),
+                "timestamp": np.datetime_as_string(columns["timestamp"][start:stop], unit="us").tolist()
+            }
+            for name in AMOUNT_COLUMNS:
+                values[name] = fils_to_float(columns[name][start:stop]).tolist()
+            for name in TEXT_COLUMNS:
+                values[name] = columns[name][start:stop].tolist()
+            for name in CODED_COLUMNS:
+                labels = self._labels[name]
+                values[name] = [labels[code] for code in columns[name][start:stop].tolist()]
+            for name in LINK_COLUMNS:
+                values[name] = [value or None for value in columns[name][start:stop].tolist()]
+            for name in TIME_COLUMNS:
+                values[name] = ["" if value == "NaT" else value for value in values[name]]
+            for row in zip(*(values[name] for name in COLUMNS)):
+                yield dict(zip(COLUMNS, row))
+
+    def to_records(self):
+        return list(self.iter_records())
+
+    def frame(self):
+        # DataFrame over the view's columns, built once without copying them
+        # (amounts are converted to KD floats)
+        if self._frame is None:
+            data = {}
+            for name in COLUMNS:
+                column = self._columns[name]
+                if name in CODED_COLUMNS:
+                    data[name] = pd.Categorical.from_codes(column, categories=self._labels[name])
+                elif name in AMOUNT_COLUMNS:
+                    data[name] = pd.Series(fils_to_float(column), copy=False)
+                elif name in LINK_COLUMNS:
+                    # Nullable integers: unlinked rows are missing values
+                    data[name] = pd.Series(pd.arrays.IntegerArray(column, column == NO_LINK), copy=False)
+                else:
+                    data[name] = pd.Series(column, dtype=column.dtype, copy=False)
+            self._frame = pd.DataFrame(data, copy=False)
+        return self._frame
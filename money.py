@@ -0,0 +1,54 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+
+# Money is counted in integer fils (1/1000 KD) wherever it is added up: the
+# ledger's amount columns, its running totals and the report cube are int64
+# fils, so sums are exact and vectorized. Amounts at rest in the budget, the
+# event and fundraising records and backups stay plain KD numbers, but every
+# update to them is done in fils and stored as the float nearest to the exact
+# result, so they never drift. Totals shown to people are Decimal KD.
+
+FILS_PER_KD = 1000
+
+# One fils, the precision amounts are rounded to
+FILS = Decimal("0.001")
+
+def to_fils(amount):
+    # KD (number, numeric string or Decimal) -> int fils, rounding half up
+    if amount is None or amount == "":
+        return 0
+    return int((Decimal(str(amount)) * FILS_PER_KD).to_integral_value(ROUND_HALF_UP))
+
+def to_fils_array(amounts):
+    # Vectorized to_fils() for arrays and Series of KD floats; missing
+    # amounts count as zero. Amounts on or near half a fils are rounded by
+    # to_fils() itself, so ties go up there as well rather than to even.
+    amounts = np.nan_to_num(np.asarray(amounts, dtype=np.float64))
+    scaled = amounts * FILS_PER_KD
+    fils = np.rint(scaled).astype(np.int64)
+    ties = np.flatnonzero(np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6)
+    if len(ties):
+        fils.flat[ties] = [to_fils(amount) for amount in amounts.flat[ties].tolist()]
+    return fils
+
+def to_kd(fils):
+    # int fils -> Decimal KD, for display
+    return Decimal(int(fils)).scaleb(-3)
+
+def fils_to_float(fils):
+    # fils (a number or an array) -> KD float, for tables, charts and
+    # backups; the nearest float to the exact amount
+    return fils / FILS_PER_KD
+
+def kd_amount(amount):
+    # An entered KD amount rounded to whole fils, as it is stored
+    return fils_to_float(to_fils(amount))
+
+def add_fils(amount, fils):
+    # A KD amount kept at rest plus some fils, as a KD float
+    return fils_to_float(to_fils(amount) + int(fils))
+
+def round_kd(amount):
+    # Decimal KD rounded half up to whole fils
+    return amount.quantize(FILS, ROUND_HALF_UP)
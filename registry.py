@@ -0,0 +1,82 @@
+STATUSES = ["Planning", "Active", "Completed"]
+
+
+class Registry:
+    # Events or fundraising initiatives keyed by a stable integer ID, kept in
+    # creation order. Besides the ID index there is a name index (names can
+    # repeat, so it maps to a list of IDs) and a status partition, all kept
+    # up to date by add() and update().
+    #
+    # Records are plain dicts with an "id" field, as stored in backups and in
+    # the write-ahead log. add() gives a new record its ID by setting it on
+    # the dict it is passed, so the logged change carries the ID and replay
+    # assigns the same one.
+    #
+    # A stored record is never modified: update() replaces it with a new
+    # dict, so copies can share the records and are only made again after a
+    # change.
+
+    def __init__(self, records=()):
+        self._records = {}
+        self._by_name = {}
+        self._by_status = {status: {} for status in STATUSES}
+        self._next_id = 1
+        self._copy = None
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __contains__(self, record_id):
+        return record_id in self._records
+
+    def add(self, record):
+        # Records from older backups have no ID yet and get the next one
+        if record.get("id") is None:
+            record["id"] = self._next_id
+        record_id = record["id"]
+        self._next_id = max(self._next_id, record_id + 1)
+        self._records[record_id] = record
+        self._by_name.setdefault(record["name"], []).append(record_id)
+        self._by_status.setdefault(record.get("status", "Planning"), {})[record_id] = None
+        self._copy = None
+        return record_id
+
+    def update(self, record_id, fields):
+        record = self._records[record_id]
+        if "name" in fields and fields["name"] != record["name"]:
+            self._by_name[record["name"]].remove(record_id)
+            self._by_name.setdefault(fields["name"], []).append(record_id)
+        if "status" in fields and fields["status"] != record.get("status", "Planning"):
+            del self._by_status[record.get("status", "Planning")][record_id]
+            self._by_status.setdefault(fields["status"], {})[record_id] = None
+        self._records[record_id] = {**record, **fields}
+        self._copy = None
+
+    def copy(self):
+        # Read-only copy sharing the records; cached until the next change
+        if self._copy is None:
+            registry = Registry()
+            registry._records = dict(self._records)
+            registry._by_name = {name: list(ids) for name, ids in self._by_name.items()}
+            registry._by_status = {status: dict(ids) for status, ids in self._by_status.items()}
+            registry._next_id = self._next_id
+            self._copy = registry
+        return self._copy
+
+    def get(self, record_id):
+        return self._records.get(record_id)
+
+    def find(self, name):
+        # Every record with this name
+        return [self._records[record_id] for record_id in self._by_name.get(name, [])]
+
+    def with_status(self, status):
+        return [self._records[record_id] for record_id in self._by_status.get(status, {})]
+
+    def records(self):
+        return list(self._records.values())
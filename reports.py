@@ -0,0 +1,148 @@
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Report exports need an Excel writer (xlsxwriter or openpyxl) and fpdf2,
+# which are optional
+try:
+    import xlsxwriter
+    EXCEL_ENGINE = "xlsxwriter"
+except ImportError:
+    try:
+        import openpyxl
+        EXCEL_ENGINE = "openpyxl"
+    except ImportError:
+        EXCEL_ENGINE = None
+
+try:
+    from fpdf import FPDF
+except ImportError:
+    FPDF = None
+
+# Monthly report columns, as shown and exported
+REPORT_COLUMNS = ["date", "description", "category", "income", "expense", "authorized_by"]
+
+def xlsx_available():
+    return EXCEL_ENGINE is not None
+
+def pdf_available():
+    return FPDF is not None
+
+def _summary_rows(report):
+    return [
+        ("Total Income", report["total_income"]),
+        ("Total Expenses", report["total_expenses"]),
+        ("Net", report["net"]),
+        ("Current Balance", report["current_balance"]),
+        ("Emergency Reserve", report["emergency_reserve"]),
+        ("Available Funds", report["available_funds"])
+    ]
+
+def monthly_report_xlsx(report):
+    # Workbook with a Summary sheet and a Transactions sheet
+    f = io.BytesIO()
+    with pd.ExcelWriter(f, engine=EXCEL_ENGINE) as writer:
+        summary = pd.DataFrame([(label, float(amount)) for label, amount in _summary_rows(report)],
+                               columns=["Item", "Amount (KD)"])
+        summary.to_excel(writer, sheet_name="Summary", index=False)
+        transactions = report["transactions"][REPORT_COLUMNS].assign(
+            date=report["transactions"]["date"].dt.strftime("%Y-%m-%d"),
+            category=report["transactions"]["category"].astype(str),
+            authorized_by=report["transactions"]["authorized_by"].astype(str)
+        )
+        transactions.to_excel(writer, sheet_name="Transactions", index=False)
+    return f.getvalue()
+
+def _latin1(text):
+    # The built-in PDF fonts only cover Latin-1
+    return str(text).encode("latin-1", "replace").decode("latin-1")
+
+def monthly_report_pdf(report, title):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", "B", 14)
+    pdf.cell(0, 10, _latin1(title), new_x="LMARGIN", new_y="NEXT")
+    pdf.set_font("Helvetica", size=10)
+    for label, amount in _summary_rows(report):
+        pdf.cell(60, 7, label)
+        pdf.cell(40, 7, f"KD {amount:.2f}", align="R", new_x="LMARGIN", new_y="NEXT")
+    pdf.ln(4)
+
+    widths = [22, 58, 36, 22, 22, 30]
+    pdf.set_font("Helvetica", "B", 9)
+    for width, name in zip(widths, REPORT_COLUMNS):
+        pdf.cell(width, 7, name, border=1)
+    pdf.ln()
+    pdf.set_font("Helvetica", size=8)
+    transactions = report["transactions"]
+    rows = zip(transactions["date"].dt.strftime("%Y-%m-%d").fillna("").tolist(),
+               transactions["description"].tolist(),
+               transactions["category"].astype(str).tolist(),
+               transactions["income"].tolist(),
+               transactions["expense"].tolist(),
+               transactions["authorized_by"].astype(str).tolist())
+    for date, description, category, income, expense, authorized_by in rows:
+        values = [date, description[:40], category[:24],
+                  f"{income:.2f}" if income > 0 else "", f"{expense:.2f}" if expense > 0 else "",
+                  authorized_by[:20]]
+        for width, value in zip(widths, values):
+            pdf.cell(width, 6, _latin1(value), border=1)
+        pdf.ln()
+    return bytes(pdf.output())
+
+
+class ReportJob:
+    # One report being rendered on the pool; progress is updated by the worker
+    # and read by whichever session is showing it
+
+    def __init__(self):
+        self.progress = 0.0
+        self.message = "Queued"
+        self.future = None
+
+    def update(self, progress, message):
+        self.progress = progress
+        self.message = message
+
+    def done(self):
+        return self.future.done()
+
+    def failed(self):
+        return self.future.done() and self.future.exception() is not None
+
+    def result(self):
+        return self.future.result()
+
+
+class ReportRenderer:
+    # Renders reports on a small worker pool so the script thread never
+    # blocks on them, and keeps the most recent jobs (finished artifacts
+    # included) by key. Keys include the book version, so a cached report is
+    # never out of date; asking for the same key again returns the same job.
+
+    def __init__(self, workers=2, keep=32):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._jobs = OrderedDict()
+        self._keep = keep
+        self._lock = threading.Lock()
+
+    def submit(self, key, render):
+        # render(progress) builds the artifact; progress(fraction, message)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.failed():
+                self._jobs.move_to_end(key)
+                return job
+            job = ReportJob()
+            job.future = self._pool.submit(render, job.update)
+            self._jobs[key] = job
+            while len(self._jobs) > self._keep:
+                self._jobs.popitem(last=False)
+            return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
@@ -0,0 +1,81 @@
+import bisect
+import math
+
+import numpy as np
+import pandas as pd
+
+# Categories not in the budget need a committee vote
+NEW_CATEGORY_AUTHORIZERS = ["Committee Vote"]
+
+# Authorization thresholds, checked in order: a transaction needs one of the
+# authorizers of the first rule whose limit its amount does not exceed. The
+# last rule has no limit (None).
+def default_auth_rules():
+    return [
+        {"up_to": 100, "authorizers": ["Chair"]},
+        {"up_to": None, "authorizers": ["Chair", "School Admin"]}
+    ]
+
+def validate_auth_rules(rules):
+    # Returns an error message, or "" when the rules can be compiled
+    if not rules:
+        return "At least one rule is required"
+    if rules[-1]["up_to"] is not None:
+        return "The last rule must be without a limit"
+    limits = [rule["up_to"] for rule in rules[:-1]]
+    if any(limit is None for limit in limits):
+        return "Only the last rule can be without a limit"
+    if any(later <= earlier for earlier, later in zip(limits, limits[1:])):
+        return "Limits must increase from one rule to the next"
+    if any(not rule["authorizers"] for rule in rules):
+        return "Every rule needs at least one authorizer"
+    return ""
+
+
+class AuthorizationEngine:
+    # Compiled form of the budget categories and the authorization rules: a
+    # category -> section hash index, the rule limits as a sorted array and
+    # each rule's authorizers as a set. Built once per change of either and
+    # never modified afterwards, so it can be shared by every reader.
+
+    def __init__(self, budget, rules):
+        self.rules = rules
+        self.budget = budget
+        self.sections = {category: section
+                         for section in ["income", "expenses"]
+                         for category in budget[section]}
+        # The last rule catches every amount above the earlier limits
+        self._limits = [float(rule["up_to"]) for rule in rules[:-1]] + [math.inf]
+        self._authorizers = [list(rule["authorizers"]) for rule in rules]
+        self._allowed = [frozenset(rule["authorizers"]) for rule in rules]
+
+    def is_current(self, budget, rules):
+        # A restore replaces the budget as a whole; otherwise categories are
+        # only ever added, so a changed count means new ones
+        return (rules is self.rules and budget is self.budget
+                and len(budget["income"]) + len(budget["expenses"]) == len(self.sections))
+
+    def _rule_index(self, amount):
+        return min(bisect.bisect_left(self._limits, amount), len(self._limits) - 1)
+
+    def required(self, amount, category):
+        if category not in self.sections:
+            return NEW_CATEGORY_AUTHORIZERS
+        return self._authorizers[self._rule_index(float(amount))]
+
+    def allowed(self, amount, category, authorizer):
+        # A new category goes to a committee vote, which is not checked here
+        if category not in self.sections:
+            return True
+        return authorizer in self._allowed[self._rule_index(float(amount))]
+
+    def allowed_batch(self, amounts, categories, authorizers):
+        # allowed() for whole Series at once
+        known = categories.isin(self.sections.keys()).to_numpy()
+        rule = np.searchsorted(self._limits, amounts.to_numpy(dtype=float), side="left")
+        rule = np.minimum(rule, len(self._limits) - 1)
+        # rule x authorizer lookup table; missing authorizers (code -1) pick
+        # the trailing all-False column
+        codes, names = pd.factorize(authorizers)
+        table = np.array([[name in allowed for name in names] + [False] for allowed in self._allowed])
+        return pd.Series(~known | table[rule, codes], index=amounts.index)
@@ -0,0 +1,396 @@
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from ledger import (AMOUNT_COLUMNS, CODED_COLUMNS, COLUMNS, LINK_COLUMNS, NO_LINK, TEXT_COLUMNS, TIME_COLUMNS,
+                    Ledger)
+from money import to_fils_array
+
+# Parquet backups need pyarrow, which is optional
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Streaming backup format: a JSON header line (format, version, budget and
+# record counts) followed by one {"collection": ..., "record": ...} line per
+# event, fundraising initiative and transaction. It is written and read a
+# line at a time, so neither side ever holds the whole backup as one string.
+BACKUP_FORMAT = "committee-backup"
+BACKUP_VERSION = 1
+
+# Transactions are parsed into the ledger this many at a time
+READ_CHUNK_SIZE = 10000
+
+def iter_backup(state, seq=0):
+    header = {
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_VERSION,
+        "seq": seq,
+        "budget": state.budget,
+        "auth_rules": state.auth_rules,
+        "counts": {
+            "events": len(state.events),
+            "fundraising": len(state.fundraising),
+            "transactions": len(state.ledger)
+        }
+    }
+    yield json.dumps(header) + "\n"
+    for collection in ["events", "fundraising"]:
+        for record in getattr(state, collection):
+            yield json.dumps({"collection": collection, "record": record}) + "\n"
+    for record in state.ledger.iter_records():
+        yield json.dumps({"collection": "transactions", "record": record}) + "\n"
+
+def write_backup(f, state, seq=0):
+    f.writelines(iter_backup(state, seq))
+
+def read_backup(f, progress=None):
+    # Parse a backup from a text file object. Returns the parts found
+    # (budget, events, fundraising and either a ready-built "ledger" or, for
+    # older single-document JSON backups, a "transactions" list).
+    # progress, if given, is called with the fraction of records read.
+    first_line = f.readline()
+    try:
+        header = json.loads(first_line)
+    except json.JSONDecodeError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != BACKUP_FORMAT:
+        # Older backups are a single JSON document
+        return json.loads(first_line + f.read())
+
+    counts = header.get("counts", {})
+    total = max(1, sum(counts.values()))
+    ledger = Ledger(capacity=max(1024, counts.get("transactions", 0)))
+    data = {
+        "budget": header["budget"],
+        "events": [],
+        "fundraising": [],
+        "ledger": ledger,
+        "seq": header.get("seq", 0)
+    }
+    if "auth_rules" in header:
+        data["auth_rules"] = header["auth_rules"]
+    chunk = []
+    done = 0
+    for line in f:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        if item["collection"] == "transactions":
+            chunk.append(item["record"])
+            if len(chunk) >= READ_CHUNK_SIZE:
+                ledger.extend(pd.DataFrame.from_records(chunk, columns=COLUMNS))
+                chunk = []
+        else:
+            data[item["collection"]].append(item["record"])
+        done += 1
+        if progress and done % READ_CHUNK_SIZE == 0:
+            progress(min(1.0, done / total))
+    if chunk:
+        ledger.extend(pd.DataFrame.from_records(chunk, columns=COLUMNS))
+    if progress:
+        progress(1.0)
+    return data
+
+
+# Parquet backup format: a zip archive with one Parquet table each for
+# transactions, events and fundraising. The budget and the authorization rules
+# travel as JSON in the transactions table's schema metadata. Amounts are
+# decimals with three places, whose unscaled integers are the fils the ledger
+# keeps, so they are written and read without going through floats; older
+# backups with float amounts are still read.
+PARQUET_BUDGET_KEY = b"committee_budget"
+PARQUET_AUTH_RULES_KEY = b"committee_auth_rules"
+PARQUET_SEQ_KEY = b"committee_seq"
+
+# Only the coded columns are worth dictionary encoding; statistics are not
+# used when reading
+PARQUET_WRITE_OPTIONS = {"compression": "lz4", "use_dictionary": CODED_COLUMNS, "write_statistics": False}
+
+def parquet_available():
+    return pa is not None
+
+def _amount_array(fils):
+    # int64 fils -> decimal128(18, 3) KD: each value is a little-endian
+    # 128-bit integer, the fils with their sign extended
+    words = np.empty((len(fils), 2), dtype=np.int64)
+    words[:, 0] = fils
+    words[:, 1] = fils >> 63
+    return pa.Array.from_buffers(pa.decimal128(18, 3), len(fils), [None, pa.py_buffer(words)])
+
+def _amount_fils(column):
+    # The amounts of a transactions table column as int64 fils
+    if pa.types.is_decimal(column.type) and column.type.scale == 3 and column.type.byte_width == 16:
+        array = column.combine_chunks().fill_null(0)
+        words = np.frombuffer(array.buffers()[1], dtype=np.int64)
+        return words[2 * array.offset:2 * (array.offset + len(array)):2]
+    return to_fils_array(column.to_numpy(zero_copy_only=False))
+
+def _transactions_table(ledger):
+    # The ledger's columns as Arrow arrays, straight from the stored values
+    columns = {}
+    for name in COLUMNS:
+        values = ledger.column(name)
+        if name in AMOUNT_COLUMNS:
+            columns[name] = _amount_array(values)
+        elif name in CODED_COLUMNS:
+            columns[name] = pa.DictionaryArray.from_arrays(values, pa.array(ledger.labels(name), pa.string()))
+        elif name in LINK_COLUMNS:
+            # Unlinked rows are missing values
+            columns[name] = pa.array(values, mask=values == NO_LINK)
+        elif name in TEXT_COLUMNS:
+            columns[name] = pa.array(values, pa.string())
+        else:
+            columns[name] = pa.array(values, from_pandas=True)
+    return pa.table(columns)
+
+def _transactions_frame(table):
+    # DataFrame for Ledger.from_frame(in_fils=True) over the table's columns,
+    # without converting them to pandas types first
+    frame = {}
+    for name in COLUMNS:
+        if name not in table.column_names:
+            # Older backups have no link columns
+            continue
+        column = table[name]
+        if name in AMOUNT_COLUMNS:
+            frame[name] = _amount_fils(column)
+        elif name in CODED_COLUMNS and pa.types.is_dictionary(column.type):
+            array = column.unify_dictionaries().combine_chunks()
+            codes = array.indices.fill_null(-1).to_numpy()
+            frame[name] = pd.Categorical.from_codes(codes, categories=array.dictionary.to_pylist())
+        elif name in LINK_COLUMNS:
+            frame[name] = column.fill_null(NO_LINK).to_numpy()
+        elif name in TIME_COLUMNS and pa.types.is_timestamp(column.type):
+            frame[name] = column.to_numpy().astype("datetime64[ns]")
+        else:
+            frame[name] = pd.Series(column.to_numpy(zero_copy_only=False), dtype=object, copy=False)
+    return pd.DataFrame(frame, copy=False)
+
+def write_parquet_backup(f, state, seq=0):
+    metadata = {
+        PARQUET_BUDGET_KEY: json.dumps(state.budget).encode("utf-8"),
+        PARQUET_AUTH_RULES_KEY: json.dumps(state.auth_rules).encode("utf-8"),
+        PARQUET_SEQ_KEY: str(seq).encode("utf-8")
+    }
+    tables = {
+        "transactions": _transactions_table(state.ledger).replace_schema_metadata(metadata),
+        "events": pa.Table.from_pylist(state.events.records()),
+        "fundraising": pa.Table.from_pylist(state.fundraising.records())
+    }
+    # Parquet is already compressed, so the archive only stores the members
+    with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, table in tables.items():
+            with archive.open(f"{name}.parquet", "w") as member:
+                pq.write_table(table, member, **PARQUET_WRITE_OPTIONS)
+
+def read_parquet_backup(f):
+    # Same result layout as read_backup()
+    with zipfile.ZipFile(f) as archive:
+        tables = {}
+        for name in ["transactions", "events", "fundraising"]:
+            tables[name] = pq.read_table(pa.BufferReader(archive.read(f"{name}.parquet")))
+    transactions = tables["transactions"]
+    metadata = transactions.schema.metadata
+    data = {
+        "budget": json.loads(metadata[PARQUET_BUDGET_KEY]),
+        "ledger": Ledger.from_frame(_transactions_frame(transactions), in_fils=True),
+        "events": tables["events"].to_pylist(),
+        "fundraising": tables["fundraising"].to_pylist(),
+        "seq": int(metadata.get(PARQUET_SEQ_KEY, b"0"))
+    }
+    if PARQUET_AUTH_RULES_KEY in metadata:
+        data["auth_rules"] = json.loads(metadata[PARQUET_AUTH_RULES_KEY])
+    return data
+
+def is_parquet_backup(f):
+    # Zip archives start with "PK"; leaves the file position unchanged
+    position = f.tell()
+    signature = f.read(2)
+    f.seek(position)
+    return signature == b"PK"
+
+
+class Store:
+    # Local storage engine: a snapshot of the whole state (in the streaming
+    # backup format) plus an append-only write-ahead log, one JSON line per
+    # change.
+    #
+    # Every log record carries a sequence number and the snapshot remembers
+    # the last one it includes, so replay after a crash between writing a
+    # snapshot and truncating the log never applies a change twice.
+    #
+    # With pyarrow the snapshot is kept in the Parquet backup format
+    # (snapshot.zip), which is written and read in a fraction of the time.
+    #
+    # Compaction never holds up writers: the log is renamed to a segment
+    # named after its last sequence number and a new log is started, then a
+    # snapshot is written from an immutable copy of the state on a
+    # background thread and the segment is deleted. Segments still on disk
+    # (after a crash, or while a compaction runs) are replayed before the log.
+
+    def __init__(self, data_dir, compact_every=1000):
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, "snapshot.jsonl")
+        self.parquet_snapshot_path = os.path.join(data_dir, "snapshot.zip")
+        self.log_path = os.path.join(data_dir, "wal.jsonl")
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
+        self._seq = 0
+        self._pending = 0
+        self._log = None
+        self._compaction = None
+        self._reset_error = None
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _segments(self):
+        # (last seq, path) of the rotated logs, oldest first
+        segments = []
+        for name in os.listdir(self.data_dir):
+            if name.startswith("wal-") and name.endswith(".jsonl"):
+                segments.append((int(name[4:-6]), os.path.join(self.data_dir, name)))
+        return sorted(segments)
+
+    def _read_snapshot(self):
+        # Both formats are only on disk together after a crash while
+        # switching between them; the later snapshot wins
+        snapshots = []
+        if os.path.exists(self.parquet_snapshot_path):
+            if not parquet_available():
+                raise RuntimeError("The stored snapshot is in Parquet format and needs the pyarrow package "
+                                   "(pip install pyarrow)")
+            with open(self.parquet_snapshot_path, "rb") as f:
+                snapshots.append(read_parquet_backup(f))
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshots.append(read_backup(f))
+        return max(snapshots, key=lambda snapshot: snapshot.get("seq", 0), default=None)
+
+    def _read(self):
+        snapshot = self._read_snapshot()
+        snapshot_seq = snapshot.get("seq", 0) if snapshot else 0
+        ops = []
+        last_seq = snapshot_seq
+        for path in [path for _, path in self._segments()] + [self.log_path]:
+            if not os.path.exists(path):
+                continue
+            with open(path, "r+b") as f:
+                good = 0
+                for line in iter(f.readline, b""):
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("torn write")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of the log; cut it off so
+                        # new records do not follow on from it
+                        f.truncate(good)
+                        break
+                    good = f.tell()
+                    if record["seq"] > snapshot_seq:
+                        ops.append((record["op"], record["data"]))
+                    last_seq = max(last_seq, record["seq"])
+        self._seq = max(self._seq, last_seq)
+        self._pending = len(ops)
+        return snapshot, ops
+
+    def load(self):
+        # Latest snapshot (or None) and the changes logged after it
+        with self.lock:
+            return self._read()
+
+    def append(self, op, data):
+        # Log one change; returns True once the log is due for compaction
+        with self.lock:
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "op": op, "data": data})
+            if self._log is None:
+                self._log = open(self.log_path, "a", encoding="utf-8")
+            self._log.write(line + "\n")
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._pending += 1
+            return self._pending >= self.compact_every
+
+    def _close_log(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _write_snapshot(self, state, seq):
+        # Replace the snapshot with state (everything up to seq), then drop
+        # the segments it includes
+        if parquet_available():
+            path, other_path = self.parquet_snapshot_path, self.snapshot_path
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                write_parquet_backup(f, state, seq)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            path, other_path = self.snapshot_path, self.parquet_snapshot_path
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write_backup(f, state, seq)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        if os.path.exists(other_path):
+            os.remove(other_path)
+        for segment_seq, path in self._segments():
+            if segment_seq <= seq:
+                os.remove(path)
+
+    def compact(self, state):
+        # Start folding the log into a new snapshot. state must be an
+        # immutable copy of the state after the last logged change (a
+        # BookSnapshot); it is written on a background thread. Does nothing
+        # while an earlier compaction is still running.
+        with self.lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return
+            self._close_log()
+            if os.path.exists(self.log_path):
+                os.replace(self.log_path, os.path.join(self.data_dir, f"wal-{self._seq}.jsonl"))
+            self._pending = 0
+            self._compaction = threading.Thread(target=self._write_snapshot, args=(state, self._seq),
+                                                name="store-compaction", daemon=True)
+            self._compaction.start()
+
+    def wait(self):
+        # Wait for a running compaction or reset to finish; raises what a
+        # reset failed with
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join()
+        error, self._reset_error = self._reset_error, None
+        if error is not None:
+            raise error
+
+    def reset(self, state):
+        # Start replacing everything on disk with state (used when restoring
+        # a backup). It is written on a background thread, so the caller can
+        # get on with other work, and is on disk once wait() returns; the
+        # caller must neither change state nor log anything until then.
+        with self.lock:
+            self.wait()
+            self._compaction = threading.Thread(target=self._reset, args=(state, self._seq),
+                                                name="store-reset", daemon=True)
+            self._compaction.start()
+
+    def _reset(self, state, seq):
+        try:
+            self._write_snapshot(state, seq)
+        except Exception as e:
+            self._reset_error = e
+            return
+        with self.lock:
+            self._close_log()
+            open(self.log_path, "w", encoding="utf-8").close()
+            self._pending = 0
@@ -0,0 +1,77 @@
+import json
+
+from audit import AuditLog
+
+
+def write_entries(data_dir, count=5, checkpoint_every=2):
+    log = AuditLog(data_dir, checkpoint_every)
+    for number in range(count):
+        log.append("budget", {"section": "expenses", "category": "Yearbook", "budget": number})
+    return log
+
+def edit_lines(path, edit):
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(edit(lines))
+
+def test_untouched_log_verifies(tmp_path):
+    log = write_entries(tmp_path)
+    assert log.verify() == (True, 2, 5, None)
+    assert log.verify(full=True) == (True, 5, 5, None)
+
+    reopened = AuditLog(tmp_path, 2)
+    assert reopened.open_check.ok
+    assert reopened.verify(full=True).ok
+    assert [checkpoint["seq"] for checkpoint in reopened.checkpoints[1:]] == [2, 4]
+
+def test_edited_entry_is_found(tmp_path):
+    write_entries(tmp_path)
+
+    def edit(lines):
+        entry = json.loads(lines[2])
+        entry["data"]["budget"] = 1000
+        lines[2] = json.dumps(entry) + "\n"
+        return lines
+    edit_lines(tmp_path / "audit.jsonl", edit)
+
+    check = AuditLog(tmp_path, 2).verify(full=True)
+    assert not check.ok
+    assert check.last_seq == 2
+    assert check.problem == "Entry 3 has been changed"
+
+def test_deleted_entry_is_found(tmp_path):
+    write_entries(tmp_path)
+    edit_lines(tmp_path / "audit.jsonl", lambda lines: lines[:1] + lines[2:])
+
+    check = AuditLog(tmp_path, 2).verify(full=True)
+    assert not check.ok
+    assert check.last_seq == 1
+    assert check.problem == "Entry 2 is missing or out of order"
+
+def test_broken_checkpoint_is_found(tmp_path):
+    write_entries(tmp_path)
+
+    def edit(lines):
+        checkpoint = json.loads(lines[0])
+        checkpoint["hash"] = "0" * 64
+        lines[0] = json.dumps(checkpoint) + "\n"
+        return lines
+    edit_lines(tmp_path / "audit_checkpoints.jsonl", edit)
+
+    log = AuditLog(tmp_path, 2)
+    # A check from the last checkpoint does not look at the earlier ones
+    assert log.verify().ok
+    check = log.verify(full=True)
+    assert not check.ok
+    assert check.problem == "Entry 2 does not match its checkpoint"
+
+def test_new_entries_follow_a_broken_chain(tmp_path):
+    write_entries(tmp_path)
+    edit_lines(tmp_path / "audit.jsonl", lambda lines: lines[:1] + lines[2:])
+
+    log = AuditLog(tmp_path, 2)
+    assert not log.open_check.ok
+    log.append("budget", {"section": "expenses", "category": "Yearbook", "budget": 9})
+    assert log.seq == 6
+    assert not log.verify(full=True).ok
@@ -0,0 +1,64 @@
+from book import Book
+from storage import Store
+from test_storage import transaction
+
+
+def event(name):
+    return {"name": name, "date": "2025-02-01", "status": "Planning", "projected_income": 50,
+            "projected_expenses": 10, "actual_income": 0, "actual_expenses": 0}
+
+def test_snapshots_do_not_change_after_later_writes(tmp_path):
+    book = Book(Store(tmp_path))
+    book.record("event", event("Bake Sale"))
+    book.record("budget", {"section": "expenses", "category": "Yearbook", "budget": 100.0})
+    before = book.snapshot()
+    cube_before = before.cube.totals(["category"]).to_dict()
+
+    for number in range(300):
+        book.record("transaction", {**transaction(number), "event_id": 1, "date": f"2025-{number % 12 + 1:02d}-01"})
+    book.record("event_update", {"id": 1, "fields": {"status": "Active"}})
+    book.record("budget", {"section": "expenses", "category": "Yearbook > Photos", "budget": 20.0})
+    after = book.snapshot()
+
+    assert before.budget["expenses"]["Yearbook"] == {"budget": 100.0, "actual": 0}
+    assert before.events.get(1)["status"] == "Planning"
+    assert before.events.get(1)["actual_expenses"] == 0
+    assert before.events.with_status("Active") == []
+    assert before.cube.totals(["category"]).to_dict() == cube_before
+    assert before.variance.row("expenses", "Yearbook") == (100000, 0)
+    assert (before.variance.frame("expenses")["Actual"] == 0).all()
+    assert before.variance.children("expenses", "Yearbook") == []
+
+    assert after.budget["expenses"]["Yearbook"] == {"budget": 100.0, "actual": 450.0}
+    assert after.events.get(1)["actual_expenses"] == 450.0
+    assert [record["id"] for record in after.events.with_status("Active")] == [1]
+    assert after.cube.totals(["event_id"]).loc[1, "expense"] == 450.0
+    assert len(after.cube) == 12
+    assert after.variance.children("expenses", "Yearbook") == ["Yearbook > Photos"]
+
+def test_restore_recompiles_the_authorization_rules(tmp_path):
+    book = Book(Store(tmp_path))
+    budget = book.snapshot().budget
+    renamed = {"income": budget["income"],
+               "expenses": {("Brand New" if category == "Yearbook" else category): values
+                            for category, values in budget["expenses"].items()}}
+    # An older backup without authorization rules
+    book.restore({"budget": renamed, "transactions": []})
+
+    authorization = book.snapshot().authorization
+    assert authorization.required(50, "Brand New") == ["Chair"]
+    assert authorization.required(50, "Yearbook") == ["Committee Vote"]
+
+def test_postings_to_the_other_section_touch_its_catch_all(tmp_path):
+    book = Book(Store(tmp_path))
+    touched = []
+    book.subscribe(lambda event, snapshot: touched.append(event.touched))
+    # Yearbook is only an expense category: income posted to it goes to
+    # Other Income
+    book.record("transaction", {**transaction(1), "income": 20})
+    book.record("transactions", [transaction(2), {**transaction(3), "category": "Nowhere"}])
+
+    assert touched[0] == [("expenses", "Yearbook"), ("income", "Other Income")]
+    assert touched[1] == [("expenses", "Other Expenses"), ("expenses", "Yearbook"),
+                          ("income", "Other Income")]
+    assert book.snapshot().budget["income"]["Other Income"]["actual"] == 20.0
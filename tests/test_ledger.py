@@ -0,0 +1,27 @@
+from ledger import Ledger
+
+
+def add(ledger, date):
+    ledger.append(date, "Purchase", "Yearbook", 0, 1.5, "Chair", "", "", f"{date}T10:00:00")
+
+def test_views_skip_a_month_that_is_still_being_added():
+    ledger = Ledger()
+    add(ledger, "2025-01-15")
+    view = ledger.view()
+    # What a reader sees between adding a month and filing its rows
+    ledger._months["date"][(2025, 2)] = ([], [])
+
+    assert view.months("date") == [(2025, 1)]
+    assert view.month_rows(2025, 2, "date") == slice(0, 0)
+
+def test_views_keep_their_months_while_the_ledger_grows():
+    ledger = Ledger()
+    add(ledger, "2025-01-15")
+    view = ledger.view()
+    add(ledger, "2025-01-16")
+    add(ledger, "2025-02-01")
+
+    assert view.months("date") == [(2025, 1)]
+    assert view.month_rows(2025, 1, "date") == slice(0, 1)
+    assert ledger.view().months("date") == [(2025, 1), (2025, 2)]
+    assert ledger.view().month_rows(2025, 1, "date") == slice(0, 2)
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from book import Book
+from importer import parse_amounts
+from money import add_fils, kd_amount, round_kd, to_fils, to_fils_array
+from storage import Store
+from test_storage import transaction
+
+# KD amounts on and around half a fils, and the fils they round to
+BOUNDARIES = [
+    (0.0005, 1), (0.0015, 2), (0.0025, 3), (1.0025, 1003), (2.0045, 2005), (1.2345, 1235),
+    (0.0004999, 0), (0.0049, 5), (123456.7895, 123456790),
+    (-0.0005, -1), (-1.0025, -1003), (-0.0004, 0), (-2.5, -2500)
+]
+
+
+def test_amounts_round_half_up_to_whole_fils():
+    for amount, fils in BOUNDARIES:
+        assert to_fils(amount) == fils, amount
+        assert to_fils(str(amount)) == fils, amount
+        assert to_fils(Decimal(str(amount))) == fils, amount
+    assert to_fils(None) == 0
+    assert to_fils("") == 0
+    assert round_kd(Decimal("0.0005")) == Decimal("0.001")
+    assert round_kd(Decimal("-0.0005")) == Decimal("-0.001")
+
+def test_bulk_rounding_matches_single_amounts():
+    amounts = [amount for amount, _ in BOUNDARIES]
+    assert to_fils_array(amounts).tolist() == [fils for _, fils in BOUNDARIES]
+    assert to_fils_array(pd.Series(amounts)).tolist() == [to_fils(amount) for amount in amounts]
+    assert to_fils_array([np.nan, 1.5]).tolist() == [0, 1500]
+
+    # Every half fils from -100 KD to 100 KD
+    halves = np.arange(-200000, 200000) / 2000 + 0.0005
+    assert (to_fils_array(halves) == [to_fils(amount) for amount in halves.tolist()]).all()
+
+def test_stored_amounts_are_whole_fils():
+    assert kd_amount(0.0005) == 0.001
+    assert kd_amount(-1.0025) == -1.003
+    assert add_fils(0.1, 200) == 0.3
+    assert parse_amounts(pd.Series(["0.0005", "(1.0025)", "0.0004", ""])).tolist() == [0.001, -1.003, 0.0, 0.0]
+
+def test_single_and_bulk_postings_add_the_same_fils(tmp_path):
+    amounts = [amount for amount, _ in BOUNDARIES if amount > 0]
+    single = Book(Store(tmp_path / "single"))
+    for number, amount in enumerate(amounts):
+        single.record("transaction", transaction(number, expense=amount))
+    bulk = Book(Store(tmp_path / "bulk"))
+    bulk.record("transactions", [transaction(number, expense=amount) for number, amount in enumerate(amounts)])
+
+    expected = sum(to_fils(amount) for amount in amounts)
+    for book in [single, bulk]:
+        snapshot = book.snapshot()
+        assert snapshot.ledger.expense_fils == expected
+        assert snapshot.variance.row("expenses", "Yearbook") == (0, expected)
+        assert snapshot.cube.sums("category").loc["Yearbook", "expense"] == expected
@@ -0,0 +1,207 @@
+import io
+import json
+import os
+import threading
+import zipfile
+
+import pytest
+
+import book as book_module
+import storage
+from book import Book
+from storage import Store
+
+
+def transaction(number, expense=1.5):
+    return {
+        "date": "2025-01-15",
+        "description": f"Purchase {number}",
+        "category": "Yearbook",
+        "income": 0,
+        "expense": expense,
+        "authorized_by": "Chair",
+        "receipt_num": str(number),
+        "notes": "",
+        "timestamp": f"2025-01-15T10:00:{number % 60:02d}",
+        "event_id": None,
+        "initiative_id": None
+    }
+
+def state(book):
+    snapshot = book.snapshot()
+    return (len(snapshot.ledger), snapshot.ledger.expense_fils, snapshot.budget,
+            snapshot.events.records())
+
+def reopen(data_dir, compact_every=1000):
+    return Book(Store(data_dir, compact_every))
+
+
+def test_log_is_replayed(tmp_path):
+    book = reopen(tmp_path)
+    for number in range(5):
+        book.record("transaction", transaction(number))
+    book.record("budget", {"section": "expenses", "category": "Yearbook", "budget": 100.0})
+    book.record("event", {"name": "Bake Sale", "date": "2025-02-01", "status": "Planning",
+                          "projected_income": 50, "projected_expenses": 10,
+                          "actual_income": 0, "actual_expenses": 0})
+
+    reopened = reopen(tmp_path)
+    assert state(reopened) == state(book)
+    assert reopened.snapshot().budget["expenses"]["Yearbook"] == {"budget": 100.0, "actual": 7.5}
+
+@pytest.mark.parametrize("parquet", [True, False])
+def test_compaction_writes_the_snapshot(tmp_path, monkeypatch, parquet):
+    if parquet and not storage.parquet_available():
+        pytest.skip("needs pyarrow")
+    if not parquet:
+        monkeypatch.setattr(storage, "pa", None)
+    book = reopen(tmp_path, compact_every=3)
+    book.record("event", {"name": "Bake Sale", "date": "2025-02-01", "status": "Planning",
+                          "projected_income": 50, "projected_expenses": 10,
+                          "actual_income": 0, "actual_expenses": 0})
+    for number in range(10):
+        book.record("transaction", {**transaction(number), "event_id": 1 if number % 2 else None})
+    book.store.wait()
+
+    snapshot_name = "snapshot.zip" if parquet else "snapshot.jsonl"
+    assert sorted(os.listdir(tmp_path)) == sorted(["wal.jsonl", snapshot_name])
+    assert state(reopen(tmp_path)) == state(book)
+
+def test_later_snapshot_wins_after_switching_format(tmp_path, monkeypatch):
+    if not storage.parquet_available():
+        pytest.skip("needs pyarrow")
+    book = reopen(tmp_path)
+    for number in range(3):
+        book.record("transaction", transaction(number))
+    book.store.compact(book.snapshot())
+    book.store.wait()
+    with open(tmp_path / "snapshot.zip", "rb") as f:
+        parquet_snapshot = f.read()
+    monkeypatch.setattr(storage, "pa", None)
+    book.record("transaction", transaction(3))
+    book.store.compact(book.snapshot())
+    book.store.wait()
+    monkeypatch.undo()
+    # A crash before the Parquet snapshot was removed
+    with open(tmp_path / "snapshot.zip", "wb") as f:
+        f.write(parquet_snapshot)
+
+    assert len(reopen(tmp_path).snapshot().ledger) == 4
+
+def test_writes_during_compaction_are_kept(tmp_path, monkeypatch):
+    release = threading.Event()
+    write_snapshot = Store._write_snapshot
+
+    def slow_write_snapshot(store, state, seq):
+        release.wait(5)
+        write_snapshot(store, state, seq)
+
+    monkeypatch.setattr(Store, "_write_snapshot", slow_write_snapshot)
+    book = reopen(tmp_path, compact_every=2)
+    for number in range(2):
+        book.record("transaction", transaction(number))
+    # The compaction is held up; writers carry on into a new log
+    for number in range(2, 7):
+        book.record("transaction", transaction(number))
+    assert state(reopen(tmp_path)) == state(book)
+
+    release.set()
+    book.store.wait()
+    assert state(reopen(tmp_path)) == state(book)
+
+def test_segment_left_by_a_crash_is_not_applied_twice(tmp_path):
+    book = reopen(tmp_path)
+    for number in range(3):
+        book.record("transaction", transaction(number))
+    with open(tmp_path / "wal.jsonl", encoding="utf-8") as f:
+        logged = f.read()
+    book.store.compact(book.snapshot())
+    book.store.wait()
+    # A crash after the snapshot was written but before the segment was
+    # deleted
+    with open(tmp_path / "wal-3.jsonl", "w", encoding="utf-8") as f:
+        f.write(logged)
+    book.record("transaction", transaction(3))
+
+    reopened = reopen(tmp_path)
+    assert len(reopened.snapshot().ledger) == 4
+    assert state(reopened) == state(book)
+
+def test_torn_write_is_ignored(tmp_path):
+    book = reopen(tmp_path)
+    for number in range(3):
+        book.record("transaction", transaction(number))
+    with open(tmp_path / "wal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"seq": 4, "op": "transac')
+
+    reopened = reopen(tmp_path)
+    assert state(reopened) == state(book)
+    # Writes after the torn one are kept
+    reopened.record("transaction", transaction(3))
+    assert len(reopen(tmp_path).snapshot().ledger) == 4
+
+def test_restore_replaces_what_is_stored(tmp_path):
+    book = reopen(tmp_path, compact_every=2)
+    for number in range(5):
+        book.record("transaction", transaction(number))
+    book.restore({"budget": book.snapshot().budget, "transactions": [transaction(9, expense=2)]})
+    book.record("transaction", transaction(10))
+
+    reopened = reopen(tmp_path)
+    assert len(reopened.snapshot().ledger) == 2
+    assert state(reopened) == state(book)
+
+def test_failed_restore_leaves_the_books_as_they_were(tmp_path, monkeypatch):
+    book = reopen(tmp_path)
+    for number in range(3):
+        book.record("transaction", transaction(number))
+    before = state(book)
+    backup = {"budget": book.snapshot().budget, "transactions": [transaction(9, expense=2)]}
+
+    def failing_write_snapshot(store, state, seq):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Store, "_write_snapshot", failing_write_snapshot)
+        with pytest.raises(OSError):
+            book.restore(backup)
+    assert len(book.ledger) == 3
+    assert state(reopen(tmp_path)) == before
+
+    def failing_rebuild_totals(state):
+        raise ValueError("bad backup")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(book_module, "rebuild_totals", failing_rebuild_totals)
+        with pytest.raises(ValueError):
+            book.restore(backup)
+    assert len(book.ledger) == 3
+    assert state(reopen(tmp_path)) == before
+    book.record("transaction", transaction(3))
+    assert len(reopen(tmp_path).snapshot().ledger) == 4
+
+def test_parquet_backups_keep_amounts_exact(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    book = reopen(tmp_path / "books")
+    book.record("transaction", {**transaction(1, expense=1.2345), "event_id": 1})
+    book.record("transaction", {**transaction(2, expense=0), "income": 1e9, "date": ""})
+    snapshot = book.snapshot()
+    backup = io.BytesIO()
+    storage.write_parquet_backup(backup, snapshot)
+    backup.seek(0)
+    ledger = storage.read_parquet_backup(backup)["ledger"]
+    assert ledger.to_records() == snapshot.ledger.to_records()
+    assert (ledger.income_fils, ledger.expense_fils) == (1000000000000, 1235)
+
+    # Older backups have float amounts and pandas metadata
+    table = pa.Table.from_pandas(snapshot.ledger.frame(), preserve_index=False)
+    metadata = {**table.schema.metadata, storage.PARQUET_BUDGET_KEY: json.dumps(snapshot.budget).encode()}
+    older = io.BytesIO()
+    with zipfile.ZipFile(older, "w") as archive:
+        for name, part in [("transactions", table.replace_schema_metadata(metadata)),
+                           ("events", pa.table({})), ("fundraising", pa.table({}))]:
+            with archive.open(f"{name}.parquet", "w") as member:
+                pq.write_table(part, member)
+    older.seek(0)
+    assert storage.read_parquet_backup(older)["ledger"].to_records() == snapshot.ledger.to_records()
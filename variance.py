@@ -0,0 +1,228 @@
+import numpy as np
+import pandas as pd
+
+from money import fils_to_float, to_fils, to_kd
+
+# Budget sections, in display order
+SECTIONS = ["income", "expenses"]
+
+# Sub-categories are named by their path from the top-level category, e.g.
+# "Graduation > Venue", so the budget stays a flat dict per section and
+# transactions are posted to the full path
+CATEGORY_SEPARATOR = " > "
+
+def parent_category(category):
+    # Path of the parent category, or None for a top-level one
+    parent, separator, _ = category.rpartition(CATEGORY_SEPARATOR)
+    return parent if separator else None
+
+def ancestor_categories(category):
+    # Paths of every category above this one, top-level first
+    parts = category.split(CATEGORY_SEPARATOR)
+    return [CATEGORY_SEPARATOR.join(parts[:depth]) for depth in range(1, len(parts))]
+
+def category_name(category):
+    # Last part of the path
+    return category.rpartition(CATEGORY_SEPARATOR)[2]
+
+def child_category(parent, name):
+    return f"{parent}{CATEGORY_SEPARATOR}{name}" if parent else name
+
+# Arrays kept per category row, in fils: its own budget and actual (postings
+# made to the category itself), the totals of its whole subtree, and the row
+# of its parent (-1 at the top level)
+_ARRAYS = ["budget", "actual", "subtree_budget", "subtree_actual", "parent"]
+
+
+class VarianceTable:
+    # Budget against actual for every category, in fils, materialized and
+    # updated in place. Categories form a tree per section and every row
+    # keeps the totals of its subtree: a posting or a budget edit changes one
+    # row, then the subtree totals of its ancestors and the running totals of
+    # its section, which is O(depth). Nothing is ever re-derived from the
+    # categories. Variance, percent used and burn rate are vectorized over
+    # the rows when a table is asked for.
+
+    def __init__(self, capacity=64):
+        # (section, category) -> row; top-level rows and child rows in order
+        self._rows = {}
+        self._keys = []
+        self._roots = {section: [] for section in SECTIONS}
+        self._children = []
+        self._arrays = {name: np.zeros(capacity, dtype=np.int64) for name in _ARRAYS}
+        # Section -> [budget, actual] in fils
+        self._totals = {section: [0, 0] for section in SECTIONS}
+        self._frames = {}
+        # Whether the category structure (_rows to _children) is shared
+        # with a copy, which only changes when a category is added
+        self._shared = False
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _row(self, section, category):
+        # Row of a category; new categories (and any missing parents) are
+        # added with nothing budgeted
+        row = self._rows.get((section, category))
+        if row is not None:
+            return row
+        parent = parent_category(category)
+        parent_row = self._row(section, parent) if parent is not None else -1
+        if self._shared:
+            self._rows = dict(self._rows)
+            self._keys = list(self._keys)
+            self._roots = {section: list(rows) for section, rows in self._roots.items()}
+            self._children = [list(rows) for rows in self._children]
+            self._shared = False
+        row = len(self._keys)
+        if row == len(self._arrays["budget"]):
+            for name, values in self._arrays.items():
+                self._arrays[name] = np.concatenate((values, np.zeros(max(row, 64), dtype=np.int64)))
+        self._arrays["parent"][row] = parent_row
+        self._rows[(section, category)] = row
+        self._keys.append((section, category))
+        self._children.append([])
+        if parent_row < 0:
+            self._roots[section].append(row)
+        else:
+            self._children[parent_row].append(row)
+        self._frames.pop(section, None)
+        return row
+
+    def _add_up(self, name, row, fils):
+        # Add to the subtree totals of a row and each of its ancestors
+        values = self._arrays[name]
+        parents = self._arrays["parent"]
+        while row >= 0:
+            values[row] += fils
+            row = parents[row]
+
+    def set_budget(self, section, category, fils):
+        row = self._row(section, category)
+        change = fils - int(self._arrays["budget"][row])
+        self._arrays["budget"][row] = fils
+        self._add_up("subtree_budget", row, change)
+        self._totals[section][0] += change
+        self._frames.pop(section, None)
+
+    def add_actual(self, section, category, fils):
+        row = self._row(section, category)
+        self._arrays["actual"][row] += fils
+        self._add_up("subtree_actual", row, fils)
+        self._totals[section][1] += fils
+        self._frames.pop(section, None)
+
+    @classmethod
+    def from_budget(cls, budget):
+        # Build from the budget dict ({section: {category: {"budget",
+        # "actual"}}} in KD)
+        table = cls(capacity=max(64, sum(len(budget[section]) for section in SECTIONS)))
+        for section in SECTIONS:
+            for category, values in budget[section].items():
+                table.set_budget(section, category, to_fils(values["budget"]))
+                table.add_actual(section, category, to_fils(values["actual"]))
+        return table
+
+    def copy(self):
+        # The copy shares the category structure until a category is added
+        # here; only the amount arrays are copied
+        table = VarianceTable(capacity=0)
+        size = len(self._keys)
+        table._rows = self._rows
+        table._keys = self._keys
+        table._roots = self._roots
+        table._children = self._children
+        table._shared = self._shared = True
+        table._arrays = {name: values[:size].copy() for name, values in self._arrays.items()}
+        table._totals = {section: list(totals) for section, totals in self._totals.items()}
+        return table
+
+    def totals(self, section):
+        # (budget, actual) of a whole section, as exact Decimal KD
+        budget, actual = self._totals[section]
+        return to_kd(budget), to_kd(actual)
+
+    def row(self, section, category):
+        # (budget, actual) of one category's own postings in fils, or None
+        row = self._rows.get((section, category))
+        if row is None:
+            return None
+        return int(self._arrays["budget"][row]), int(self._arrays["actual"][row])
+
+    def subtree(self, section, category):
+        # (budget, actual) of a category and everything under it in fils, or
+        # None
+        row = self._rows.get((section, category))
+        if row is None:
+            return None
+        return int(self._arrays["subtree_budget"][row]), int(self._arrays["subtree_actual"][row])
+
+    def children(self, section, category=None):
+        # Paths of the categories directly under category (top level if None)
+        if category is None:
+            rows = self._roots[section]
+        elif (section, category) in self._rows:
+            rows = self._children[self._rows[(section, category)]]
+        else:
+            rows = []
+        return [self._keys[row][1] for row in rows]
+
+    def _tree_order(self, section):
+        # Rows of a section, each followed by its subtree
+        rows = []
+        stack = list(reversed(self._roots[section]))
+        while stack:
+            row = stack.pop()
+            rows.append(row)
+            stack.extend(reversed(self._children[row]))
+        return rows
+
+    def frame(self, section, months=1):
+        # One row per category of the section in tree order, in KD: budget,
+        # actual, variance (actual - budget), percent of the budget used and
+        # burn rate (actual per month over the months the actuals cover).
+        # The figures are each category's own; see subtree_frame() for
+        # roll-ups.
+        if section not in self._frames:
+            rows = self._tree_order(section)
+            self._frames[section] = (
+                [self._keys[row][1] for row in rows],
+                self._arrays["budget"][rows],
+                self._arrays["actual"][rows]
+            )
+        categories, budget, actual = self._frames[section]
+        return _variance_frame(categories, budget, actual, months)
+
+    def subtree_frame(self, section, category=None, months=1):
+        # Drill-down: the categories directly under category (the top level
+        # if None) with the totals of their subtrees, plus a "(direct)" row
+        # for postings made to category itself, so the rows add up to its
+        # subtree totals
+        rows = (self._roots[section] if category is None
+                else self._children[self._rows[(section, category)]])
+        names = [category_name(self._keys[row][1]) for row in rows]
+        budget = self._arrays["subtree_budget"][rows]
+        actual = self._arrays["subtree_actual"][rows]
+        if category is not None:
+            own = self._rows[(section, category)]
+            own_budget, own_actual = self._arrays["budget"][own], self._arrays["actual"][own]
+            if own_budget or own_actual:
+                names.append("(direct)")
+                budget = np.append(budget, own_budget)
+                actual = np.append(actual, own_actual)
+        frame = _variance_frame(names, budget, actual, months)
+        frame.insert(1, "Subcategories", [len(self._children[row]) for row in rows]
+                     + [0] * (len(names) - len(rows)))
+        return frame
+
+
+def _variance_frame(categories, budget, actual, months):
+    budgeted = np.where(budget > 0, budget, np.nan)
+    return pd.DataFrame({
+        "Category": categories,
+        "Budget": fils_to_float(budget),
+        "Actual": fils_to_float(actual),
+        "Variance": fils_to_float(actual - budget),
+        "% of Budget": actual / budgeted * 100,
+        "Burn Rate": fils_to_float(actual) / max(1, months)
+    })
@@ -0,0 +1,211 @@
+import plotly.graph_objects as go
+import streamlit as st
+
+from diagnostics import instrument
+from finance import budget_table, budget_totals, get_book, set_category_budget
+from formatting import CURRENCY_FORMAT, currency_config, percent_config
+from variance import CATEGORY_SEPARATOR, child_category
+
+# Budget tables: amounts in KD, "% of Budget" empty when nothing is budgeted
+BUDGET_TABLE_CONFIG = {**currency_config("Budget", "Actual", "Variance"), **percent_config("% of Budget"),
+                       "Burn Rate": st.column_config.NumberColumn("Burn Rate (KD/month)", format=CURRENCY_FORMAT)}
+
+@instrument
+@st.cache_data(max_entries=16)
+def budget_summary_chart(version, _snapshot):
+    # Plotted as floats
+    total_income_budget, total_income_actual, total_expense_budget, total_expense_actual = \
+        (float(total) for total in budget_totals(_snapshot))
+    fig = go.Figure()
+    
+    # Add budget bars
+    fig.add_trace(go.Bar(
+        name='Income Budget',
+        x=['Income'],
+        y=[total_income_budget],
+        marker_color='rgba(44, 160, 44, 0.7)'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='Income Actual',
+        x=['Income'],
+        y=[total_income_actual],
+        marker_color='rgba(44, 160, 44, 1.0)'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='Expense Budget',
+        x=['Expense'],
+        y=[total_expense_budget],
+        marker_color='rgba(214, 39, 40, 0.7)'
+    ))
+    
+    fig.add_trace(go.Bar(
+        name='Expense Actual',
+        x=['Expense'],
+        y=[total_expense_actual],
+        marker_color='rgba(214, 39, 40, 1.0)'
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title='Budget vs. Actual Summary',
+        xaxis_title='Category',
+        yaxis_title='Amount (KD)',
+        barmode='group'
+    )
+    return fig
+
+# Budget amounts are only recorded when they are edited in this session
+def save_budget_amount(section, category, key):
+    set_category_budget(section, category, st.session_state[key])
+
+def budget_amount_input(section, category, current_budget, key):
+    # The books are shared, so a widget still showing an old amount must not
+    # write it back: amounts changed elsewhere are copied into the widget
+    # and only an edit made here (on_change) is saved
+    seen = st.session_state.setdefault("budget_amounts_seen", {})
+    if seen.get(key) != current_budget:
+        st.session_state[key] = float(current_budget)
+        seen[key] = current_budget
+    st.number_input(f"New budget for {category}",
+                    min_value=0.0,
+                    key=key,
+                    format="%.2f",
+                    on_change=save_budget_amount,
+                    args=(section, category, key))
+
+# Budget function
+def show():
+    st.header("Budget Management")
+    budget = get_book().snapshot().budget
+    
+    # Add new budget category
+    with st.expander("Add New Budget Category"):
+        with st.form("new_category_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                category_name = st.text_input("Category Name")
+                category_type = st.radio("Category Type", ["Income", "Expenses"])
+            
+            with col2:
+                initial_budget = st.number_input("Initial Budget (KD)", min_value=0.0, format="%.2f")
+                parent = st.selectbox("Sub-category of", [None] + list(budget["income"]) + list(budget["expenses"]),
+                                      format_func=lambda category: "None (top level)" if category is None
+                                      else category,
+                                      help="A sub-category goes in the same section as its parent")
+            
+            submit = st.form_submit_button("Add Category")
+            
+            if submit:
+                if not category_name:
+                    st.error("Category name is required")
+                elif CATEGORY_SEPARATOR in category_name:
+                    st.error(f"Category names cannot contain '{CATEGORY_SEPARATOR.strip()}'")
+                else:
+                    category_type = category_type.lower()
+                    if parent is not None:
+                        category_type = "income" if parent in budget["income"] else "expenses"
+                        category_name = child_category(parent, category_name)
+                    if category_type == "income":
+                        if category_name in budget["income"]:
+                            st.error(f"Category '{category_name}' already exists in income categories")
+                        else:
+                            set_category_budget("income", category_name, initial_budget)
+                            st.success(f"Added '{category_name}' to income categories")
+                    else:
+                        if category_name in budget["expenses"]:
+                            st.error(f"Category '{category_name}' already exists in expense categories")
+                        else:
+                            set_category_budget("expenses", category_name, initial_budget)
+                            st.success(f"Added '{category_name}' to expense categories")
+    
+    # Adjust existing budget categories (including one just added above)
+    snapshot = get_book().snapshot()
+    budget = snapshot.budget
+    with st.expander("Adjust Budget Amounts"):
+        st.subheader("Income Categories")
+        
+        for category, values in budget["income"].items():
+            col1, col2, col3 = st.columns([3, 2, 2])
+            
+            with col1:
+                st.text(category)
+            
+            with col2:
+                current_budget = values["budget"]
+                st.text(f"Current: KD {current_budget:.2f}")
+            
+            with col3:
+                budget_amount_input("income", category, current_budget, f"income_{category}")
+        
+        st.subheader("Expense Categories")
+        
+        for category, values in budget["expenses"].items():
+            col1, col2, col3 = st.columns([3, 2, 2])
+            
+            with col1:
+                st.text(category)
+            
+            with col2:
+                current_budget = values["budget"]
+                st.text(f"Current: KD {current_budget:.2f}")
+            
+            with col3:
+                budget_amount_input("expenses", category, current_budget, f"expense_{category}")
+    
+    # Budget overview
+    st.subheader("Budget Summary")
+    
+    # Calculate totals
+    total_income_budget, total_income_actual, total_expense_budget, total_expense_actual = \
+        budget_totals(snapshot)
+    
+    # Display summary metrics
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Total Income Budget", f"KD {total_income_budget:.2f}")
+    
+    with col2:
+        st.metric("Total Income Actual", f"KD {total_income_actual:.2f}", 
+                 f"{(total_income_actual - total_income_budget):.2f}")
+    
+    with col3:
+        st.metric("Total Expense Budget", f"KD {total_expense_budget:.2f}")
+    
+    with col4:
+        st.metric("Total Expense Actual", f"KD {total_expense_actual:.2f}", 
+                 f"{(total_expense_actual - total_expense_budget):.2f}")
+    
+    # Budget tables
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Income Budget")
+        
+        if budget["income"]:
+            st.dataframe(budget_table("income", snapshot), use_container_width=True,
+                         column_config=BUDGET_TABLE_CONFIG)
+    
+    with col2:
+        st.subheader("Expense Budget")
+        
+        if budget["expenses"]:
+            st.dataframe(budget_table("expenses", snapshot), use_container_width=True,
+                         column_config=BUDGET_TABLE_CONFIG)
+    
+    # Budget visualization
+    st.subheader("Budget Visualization")
+    
+    try:
+        # Budget vs. Actual bar chart
+        fig = budget_summary_chart(snapshot.version, snapshot)
+        
+        st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error creating chart: {e}")
+        # Display as text instead
+        st.write(f"Income Budget: KD {total_income_budget:.2f}, Actual: KD {total_income_actual:.2f}")
+        st.write(f"Expense Budget: KD {total_expense_budget:.2f}, Actual: KD {total_expense_actual:.2f}")
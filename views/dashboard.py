@@ -0,0 +1,151 @@
+import datetime
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from diagnostics import instrument
+from finance import (EMERGENCY_RESERVE_RATE, budget_subtree_table, get_balance, get_book,
+                     get_emergency_reserve)
+from forecast import forecast
+from formatting import blank_zero_amounts, transaction_config
+from money import fils_to_float
+
+# Forecast of the balance against the emergency reserve, cached on the book
+# version and the month it starts from
+@instrument
+@st.cache_data(max_entries=8)
+def cash_flow_forecast(version, start, months, _snapshot):
+    # Seasonality comes from complete past months of transactions that are not
+    # linked to an event or initiative; those are forecast from their plans
+    history = _snapshot.cube.totals(["year", "month"], event_id=0, initiative_id=0).reset_index()
+    history = history[history["year"] * 12 + history["month"] < start.year * 12 + start.month]
+    ledger = _snapshot.ledger
+    # The simulation itself runs on KD floats
+    return forecast(fils_to_float(ledger.income_fils - ledger.expense_fils), fils_to_float(ledger.income_fils),
+                    history, _snapshot.events.records(), _snapshot.fundraising.records(), start, months,
+                    float(EMERGENCY_RESERVE_RATE))
+
+# Budget vs. actual charts from the variance table, cached on the book
+# version
+BUDGET_CHART_COLORS = {
+    "income": ("Income: Budget vs. Actual", ["#1f77b4", "#2ca02c"]),
+    "expenses": ("Expenses: Budget vs. Actual", ["#d62728", "#ff7f0e"])
+}
+
+@instrument
+@st.cache_data(max_entries=16)
+def budget_chart(section, category, version, _snapshot):
+    # The categories under category (the top level if None), each with the
+    # totals of its subtree
+    title, colors = BUDGET_CHART_COLORS[section]
+    return px.bar(budget_subtree_table(section, category, _snapshot), x="Category", y=["Budget", "Actual"],
+                  title=title if category is None else f"{title}: {category}",
+                  barmode="group",
+                  color_discrete_sequence=colors)
+
+# Dashboard function
+def show():
+    st.header("Financial Dashboard")
+    
+    # Summary cards in a row
+    col1, col2, col3 = st.columns(3)
+    
+    snapshot = get_book().snapshot()
+    balance = get_balance()
+    reserve = get_emergency_reserve()
+    available = balance - reserve
+    
+    with col1:
+        st.metric("Current Balance", f"KD {balance:.2f}")
+    
+    with col2:
+        st.metric("Emergency Reserve (15%)", f"KD {reserve:.2f}")
+    
+    with col3:
+        st.metric("Available Funds", f"KD {available:.2f}")
+    
+    # Recent transactions
+    st.subheader("Recent Transactions")
+    
+    if len(snapshot.ledger):
+        # Rows are kept in entry order, so the last 5 are the newest
+        recent_transactions = snapshot.ledger.frame().tail(5).iloc[::-1]
+        # Select only the columns we want to display
+        display_columns = ["date", "description", "category", "income", "expense", "authorized_by"]
+        st.dataframe(blank_zero_amounts(recent_transactions[display_columns]), use_container_width=True,
+                     column_config=transaction_config())
+    else:
+        st.info("No transactions recorded yet.")
+    
+    # Budget overview with charts
+    st.subheader("Budget Overview")
+    
+    col1, col2 = st.columns(2)
+    
+    for column, section in [(col1, "income"), (col2, "expenses")]:
+        with column:
+            # Budget vs actual, rebuilt only when the books change. Categories
+            # with sub-categories can be opened.
+            if snapshot.budget[section]:
+                parents = [category for category in snapshot.budget[section]
+                           if snapshot.variance.children(section, category)]
+                category = None
+                if parents:
+                    category = st.selectbox("Drill into", [None] + parents, key=f"budget_drill_{section}",
+                                            format_func=lambda category: "All categories" if category is None
+                                            else category)
+                try:
+                    fig = budget_chart(section, category, snapshot.version, snapshot)
+                    st.plotly_chart(fig, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Error creating chart: {e}")
+                    st.dataframe(budget_subtree_table(section, category, snapshot)[["Category", "Budget", "Actual"]])
+    
+    # Cash-flow forecast
+    st.subheader("Cash-flow Forecast")
+    
+    months_ahead = st.select_slider("Months ahead", [6, 12, 24, 36], value=12, key="forecast_months")
+    projection = cash_flow_forecast(snapshot.version, datetime.date.today().replace(day=1), months_ahead, snapshot)
+    at_risk = projection[projection["shortfall_probability"] >= 0.2]
+    if len(at_risk):
+        first = at_risk.iloc[0]
+        st.warning(f"{first['shortfall_probability']:.0%} chance that the balance falls below the emergency "
+                   f"reserve by the end of {first['month']:%B %Y}")
+    else:
+        st.success("The balance is expected to stay above the emergency reserve")
+    
+    try:
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=projection["month"], y=projection["balance_p90"], mode="lines",
+                                 line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=projection["month"], y=projection["balance_p10"], mode="lines",
+                                 line=dict(width=0), fill="tonexty", fillcolor="rgba(31, 119, 180, 0.2)",
+                                 name="Balance (10th-90th percentile)"))
+        fig.add_trace(go.Scatter(x=projection["month"], y=projection["balance_p50"], mode="lines",
+                                 line=dict(color="#1f77b4"), name="Balance (median)"))
+        fig.add_trace(go.Scatter(x=projection["month"], y=projection["expected_reserve"], mode="lines",
+                                 line=dict(color="#d62728", dash="dash"), name="Emergency Reserve"))
+        fig.update_layout(title="Projected Balance vs. Emergency Reserve", xaxis_title="Month",
+                          yaxis_title="Amount (KD)")
+        st.plotly_chart(fig, use_container_width=True)
+    except Exception as e:
+        st.error(f"Error creating chart: {e}")
+        st.dataframe(projection)
+    
+    # Quick actions
+    st.subheader("Quick Actions")
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        if st.button("Add Transaction", use_container_width=True):
+            st.session_state.page = "transactions"
+    
+    with col2:
+        if st.button("Generate Report", use_container_width=True):
+            st.session_state.page = "reports"
+    
+    with col3:
+        if st.button("Manage Budget", use_container_width=True):
+            st.session_state.page = "budget"
@@ -0,0 +1,148 @@
+import pandas as pd
+import streamlit as st
+
+from finance import (adjust_event_actuals, committee_members, create_event_budget, get_book, record_label,
+                     update_event)
+from formatting import currency_config
+from money import fils_to_float, to_fils
+from registry import STATUSES
+
+# Events function
+def show():
+    st.header("Event Management")
+    
+    # Add new event
+    with st.expander("Create New Event Budget", expanded=True):
+        with st.form("event_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                event_name = st.text_input("Event Name")
+                event_date = st.date_input("Date")
+                location = st.text_input("Location")
+            
+            with col2:
+                coordinator = st.selectbox("Event Coordinator", list(committee_members.keys()))
+                projected_income = st.number_input("Projected Income (KD)", min_value=0.0, format="%.2f")
+                projected_expenses = st.number_input("Projected Expenses (KD)", min_value=0.0, format="%.2f")
+            
+            submit = st.form_submit_button("Create Event Budget")
+            
+            if submit:
+                if not event_name or not event_date:
+                    st.error("Event name and date are required")
+                else:
+                    success, message = create_event_budget(
+                        event_name,
+                        event_date.strftime("%Y-%m-%d"),
+                        location,
+                        coordinator,
+                        projected_income,
+                        projected_expenses
+                    )
+                    
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+    
+    # View events
+    st.subheader("Planned Events")
+    
+    events = get_book().snapshot().events
+    if len(events):
+        status_view = st.radio("Show", ["All"] + STATUSES, horizontal=True, key="events_status_view")
+        shown = events.records() if status_view == "All" else events.with_status(status_view)
+        events_df = pd.DataFrame(shown, columns=["name", "date", "location", "coordinator",
+                                                 "projected_income", "projected_expenses", "status"])
+        try:
+            # Rename columns for display
+            display_df = events_df.rename(columns={
+                "name": "Event Name",
+                "date": "Date",
+                "location": "Location",
+                "coordinator": "Coordinator",
+                "projected_income": "Projected Income",
+                "projected_expenses": "Projected Expenses",
+                "actual_income": "Actual Income",
+                "actual_expenses": "Actual Expenses",
+                "status": "Status"
+            })
+            # Select columns to display
+            display_columns = [col for col in ["Event Name", "Date", "Location", "Coordinator", 
+                               "Projected Income", "Projected Expenses", "Status"]
+                               if col in display_df.columns]
+            st.dataframe(display_df[display_columns], use_container_width=True,
+                         column_config=currency_config("Projected Income", "Projected Expenses"))
+        except Exception as e:
+            st.error(f"Error displaying events: {e}")
+            st.write(events_df)
+        
+        # Event details
+        st.subheader("Event Details")
+        selected_id = st.selectbox("Select event to view details", [event["id"] for event in events],
+                                   format_func=lambda event_id: record_label(events, event_id, "date"))
+        
+        if selected_id is not None:
+            event = events.get(selected_id)
+            
+            if event is not None:
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.subheader(event["name"])
+                    st.write(f"**Date:** {event['date']}")
+                    st.write(f"**Location:** {event['location']}")
+                    st.write(f"**Coordinator:** {event['coordinator']}")
+                    st.write(f"**Status:** {event['status']}")
+                
+                with col2:
+                    # Financial summary
+                    st.subheader("Financial Summary")
+                    projected_profit = event["projected_income"] - event["projected_expenses"]
+                    actual_profit = event["actual_income"] - event["actual_expenses"]
+                    
+                    st.write(f"**Projected Income:** KD {event['projected_income']:.2f}")
+                    st.write(f"**Projected Expenses:** KD {event['projected_expenses']:.2f}")
+                    st.write(f"**Projected Profit:** KD {projected_profit:.2f}")
+                    st.write(f"**Actual Income:** KD {event['actual_income']:.2f}")
+                    st.write(f"**Actual Expenses:** KD {event['actual_expenses']:.2f}")
+                    st.write(f"**Actual Profit:** KD {actual_profit:.2f}")
+                
+                # Update event status
+                new_status = st.selectbox("Update Status", 
+                                         ["Planning", "Active", "Completed"],
+                                         index=["Planning", "Active", "Completed"].index(event["status"]))
+                
+                if new_status != event["status"]:
+                    update_event(event["id"], status=new_status)
+                    st.success(f"Updated {event['name']} status to {new_status}")
+                
+                # Correct the actual figures by hand
+                with st.expander("Update Actual Figures"):
+                    st.caption("Transactions linked to this event are added to its actual figures automatically. "
+                               "Figures entered here are recorded as an adjustment on top of them.")
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        new_income = st.number_input("Actual Income (KD)", 
+                                                   min_value=0.0, 
+                                                   value=float(event["actual_income"]),
+                                                   format="%.2f")
+                    
+                    with col2:
+                        new_expenses = st.number_input("Actual Expenses (KD)", 
+                                                     min_value=0.0, 
+                                                     value=float(event["actual_expenses"]),
+                                                     format="%.2f")
+                    
+                    if st.button("Update Figures"):
+                        # The difference from the figures shown, so postings
+                        # made meanwhile are not overwritten
+                        income = to_fils(new_income) - to_fils(event["actual_income"])
+                        expenses = to_fils(new_expenses) - to_fils(event["actual_expenses"])
+                        if income or expenses:
+                            adjust_event_actuals(event["id"], fils_to_float(income), fils_to_float(expenses))
+                        st.success("Updated actual figures")
+    else:
+        st.info("No events created yet.")
@@ -0,0 +1,85 @@
+import pandas as pd
+import streamlit as st
+
+from finance import add_fundraising_initiative, committee_members, get_book, record_label, update_initiative
+from formatting import currency_config
+from registry import STATUSES
+
+# Fundraising function (simplified)
+def show():
+    st.header("Fundraising Management")
+    
+    # Add new fundraising initiative
+    with st.expander("Add New Fundraising Initiative", expanded=True):
+        with st.form("fundraising_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                name = st.text_input("Initiative Name")
+                dates = st.text_input("Dates (e.g., Apr 15-20)")
+            
+            with col2:
+                coordinator = st.selectbox("Coordinator", list(committee_members.keys()))
+                goal_amount = st.number_input("Goal Amount (KD)", min_value=0.0, format="%.2f")
+            
+            submit = st.form_submit_button("Add Initiative")
+            
+            if submit:
+                if not name:
+                    st.error("Initiative name is required")
+                else:
+                    success, message = add_fundraising_initiative(
+                        name,
+                        dates,
+                        coordinator,
+                        goal_amount
+                    )
+                    
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(message)
+    
+    # View fundraising initiatives
+    st.subheader("Fundraising Initiatives")
+    
+    fundraising = get_book().snapshot().fundraising
+    if len(fundraising):
+        status_view = st.radio("Show", ["All"] + STATUSES, horizontal=True, key="fundraising_status_view")
+        shown = fundraising.records() if status_view == "All" else fundraising.with_status(status_view)
+        try:
+            fundraising_df = pd.DataFrame(shown, columns=["name", "dates", "coordinator", "goal_amount",
+                                                          "actual_raised", "expenses", "net_proceeds", "status"])
+            # Rename columns for display
+            display_df = fundraising_df.rename(columns={
+                "name": "Initiative Name",
+                "dates": "Dates",
+                "coordinator": "Coordinator",
+                "goal_amount": "Goal Amount",
+                "actual_raised": "Amount Raised",
+                "expenses": "Expenses",
+                "net_proceeds": "Net Proceeds",
+                "status": "Status"
+            })
+            # Select columns to display
+            display_columns = [col for col in ["Initiative Name", "Dates", "Coordinator", 
+                              "Goal Amount", "Amount Raised", "Status"]
+                              if col in display_df.columns]
+            st.dataframe(display_df[display_columns], use_container_width=True,
+                         column_config=currency_config("Goal Amount", "Amount Raised"))
+        except Exception as e:
+            st.error(f"Error displaying fundraising initiatives: {e}")
+            st.write(fundraising_df)
+        
+        # Initiative status
+        selected_id = st.selectbox("Select initiative", [initiative["id"] for initiative in fundraising],
+                                   format_func=lambda initiative_id: record_label(fundraising, initiative_id, "dates"))
+        initiative = fundraising.get(selected_id)
+        if initiative is not None:
+            new_status = st.selectbox("Update Initiative Status", STATUSES,
+                                      index=STATUSES.index(initiative["status"]))
+            if new_status != initiative["status"]:
+                update_initiative(initiative["id"], status=new_status)
+                st.success(f"Updated {initiative['name']} status to {new_status}")
+    else:
+        st.info("No fundraising initiatives created yet.")
@@ -0,0 +1,257 @@
+import datetime
+import functools
+import time
+
+import plotly.express as px
+import streamlit as st
+
+from diagnostics import instrument
+from finance import (MONTH_NAMES, generate_event_report, generate_fundraising_report, generate_monthly_report,
+                     generate_ytd_report, get_book)
+from formatting import blank_zero_amounts, currency_config, percent_config, transaction_config
+from money import to_fils_array, to_kd
+from reports import (REPORT_COLUMNS, ReportRenderer, monthly_report_pdf, monthly_report_xlsx, pdf_available,
+                     xlsx_available)
+
+# Reports are rendered in the background and kept by (report, period,
+# book version), for every session in this process
+@st.cache_resource
+def get_report_renderer():
+    return ReportRenderer()
+
+@instrument
+def render_monthly_report(snapshot, month, year, by, progress):
+    # Runs on the report pool: the report and its exports, from one snapshot
+    progress(0.1, "Selecting transactions")
+    report = generate_monthly_report(month, year, by, snapshot)
+    title = f"Monthly Financial Report - {MONTH_NAMES[month - 1]} {year}"
+    report["xlsx"] = report["pdf"] = None
+    if xlsx_available():
+        progress(0.4, "Building spreadsheet")
+        report["xlsx"] = monthly_report_xlsx(report)
+    if pdf_available():
+        progress(0.7, "Building PDF")
+        report["pdf"] = monthly_report_pdf(report, title)
+    progress(1.0, "Done")
+    return report
+
+# Reports function (simplified version)
+def show():
+    st.header("Financial Reports")
+    
+    # Report type selection
+    report_type = st.radio("Report Type", 
+                          ["Monthly Summary", "Year-to-Date", "Event Analysis", "Fundraising Results"],
+                          horizontal=True)
+    
+    if report_type == "Monthly Summary":
+        # Month and year selection
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            selected_month = st.selectbox("Month", MONTH_NAMES)
+            month_index = MONTH_NAMES.index(selected_month) + 1
+        
+        with col2:
+            current_year = datetime.datetime.now().year
+            selected_year = st.selectbox("Year", 
+                                        list(range(current_year-2, current_year+3)))
+        
+        group_by = st.radio("Group transactions by", ["Entry timestamp", "Posting date"], horizontal=True)
+        
+        by = "date" if group_by == "Posting date" else "timestamp"
+        
+        # Generate report in the background; the same report for an
+        # unchanged ledger is served from the renderer's cache
+        renderer = get_report_renderer()
+        if st.button("Generate Report"):
+            snapshot = get_book().snapshot()
+            key = ("monthly", month_index, selected_year, by, snapshot.version)
+            renderer.submit(key, functools.partial(render_monthly_report, snapshot, month_index, selected_year, by))
+            st.session_state.monthly_report_key = key
+        
+        key = st.session_state.get("monthly_report_key")
+        job = renderer.get(key) if key and key[1:4] == (month_index, selected_year, by) else None
+        if job is not None and not job.done():
+            st.progress(job.progress, text=job.message)
+            time.sleep(0.2)
+            st.rerun()
+        elif job is not None and job.failed():
+            st.error(f"Error generating report: {job.future.exception()}")
+        elif job is not None:
+            report = job.result()
+            
+            # Display report
+            st.subheader(f"Monthly Financial Report - {selected_month} {selected_year}")
+            
+            # Summary metrics
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Total Income", f"KD {report['total_income']:.2f}")
+            
+            with col2:
+                st.metric("Total Expenses", f"KD {report['total_expenses']:.2f}")
+            
+            with col3:
+                st.metric("Net", f"KD {report['net']:.2f}")
+            
+            # Overall financial position
+            st.subheader("Overall Financial Position")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Current Balance", f"KD {report['current_balance']:.2f}")
+            
+            with col2:
+                st.metric("Emergency Reserve", f"KD {report['emergency_reserve']:.2f}")
+            
+            with col3:
+                st.metric("Available Funds", f"KD {report['available_funds']:.2f}")
+            
+            # Transactions
+            st.subheader("Transactions")
+            
+            if len(report['transactions']):
+                transactions_df = blank_zero_amounts(report['transactions'][REPORT_COLUMNS])
+                st.dataframe(transactions_df, use_container_width=True,
+                             column_config=transaction_config())
+            else:
+                st.info("No transactions for this period.")
+            
+            # Exports
+            file_name = f"report_{selected_year}_{month_index:02d}"
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                if report["xlsx"] is not None:
+                    st.download_button("Download Excel", data=report["xlsx"], file_name=f"{file_name}.xlsx",
+                                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                else:
+                    st.caption("Excel export needs xlsxwriter or openpyxl.")
+            
+            with col2:
+                if report["pdf"] is not None:
+                    st.download_button("Download PDF", data=report["pdf"], file_name=f"{file_name}.pdf",
+                                       mime="application/pdf")
+                else:
+                    st.caption("PDF export needs fpdf2.")
+    
+    elif report_type == "Year-to-Date":
+        current_year = datetime.datetime.now().year
+        selected_year = st.selectbox("Year", list(range(current_year-2, current_year+3)), index=2,
+                                     key="ytd_year")
+        report = generate_ytd_report(selected_year)
+        
+        st.subheader(f"Year-to-Date Report - {selected_year}")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Total Income", f"KD {report['total_income']:.2f}")
+        
+        with col2:
+            st.metric("Total Expenses", f"KD {report['total_expenses']:.2f}")
+        
+        with col3:
+            st.metric("Net", f"KD {report['net']:.2f}")
+        
+        monthly = report["monthly"].reset_index()
+        try:
+            fig = px.bar(monthly, x="month", y=["income", "expense"], barmode="group",
+                         title="Income and Expenses by Month",
+                         color_discrete_sequence=["#2ca02c", "#d62728"])
+            st.plotly_chart(fig, use_container_width=True)
+        except Exception as e:
+            st.error(f"Error creating chart: {e}")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("By Month")
+            st.dataframe(monthly, use_container_width=True, hide_index=True,
+                         column_config=currency_config("income", "expense", "net"))
+        
+        with col2:
+            st.subheader("By Category")
+            if len(report["categories"]):
+                st.dataframe(report["categories"].reset_index(), use_container_width=True, hide_index=True,
+                             column_config=currency_config("income", "expense", "net"))
+            else:
+                st.info("No transactions for this year.")
+    
+    elif report_type == "Event Analysis":
+        report = generate_event_report()
+        
+        if len(report):
+            st.subheader("Event Analysis")
+            st.caption("Actual figures are each event's own: its linked transactions plus any adjustments "
+                       "entered under Update Figures.")
+            display_df = report.drop(columns="id").rename(columns={
+                "name": "Event Name",
+                "date": "Date",
+                "status": "Status",
+                "projected_income": "Projected Income",
+                "projected_expenses": "Projected Expenses",
+                "projected_net": "Projected Net",
+                "actual_income": "Actual Income",
+                "actual_expenses": "Actual Expenses",
+                "actual_net": "Actual Net",
+                "variance": "Variance"
+            })
+            st.dataframe(display_df, use_container_width=True, hide_index=True,
+                         column_config=currency_config("Projected Income", "Projected Expenses", "Projected Net",
+                                                       "Actual Income", "Actual Expenses", "Actual Net",
+                                                       "Variance"))
+            try:
+                fig = px.bar(display_df, x="Event Name", y=["Projected Net", "Actual Net"], barmode="group",
+                             title="Projected vs. Actual Net by Event",
+                             color_discrete_sequence=["#1f77b4", "#2ca02c"])
+                st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error creating chart: {e}")
+        else:
+            st.info("No events created yet.")
+    
+    elif report_type == "Fundraising Results":
+        report = generate_fundraising_report()
+        
+        if len(report):
+            st.subheader("Fundraising Results")
+            st.caption("Figures are each initiative's own, kept up to date by the transactions linked to it.")
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                st.metric("Total Raised", f"KD {to_kd(to_fils_array(report['raised']).sum()):.2f}")
+            
+            with col2:
+                st.metric("Total Expenses", f"KD {to_kd(to_fils_array(report['expenses']).sum()):.2f}")
+            
+            with col3:
+                st.metric("Net Proceeds", f"KD {to_kd(to_fils_array(report['net_proceeds']).sum()):.2f}")
+            
+            display_df = report.drop(columns="id").rename(columns={
+                "name": "Initiative Name",
+                "dates": "Dates",
+                "status": "Status",
+                "goal_amount": "Goal Amount",
+                "raised": "Amount Raised",
+                "expenses": "Expenses",
+                "net_proceeds": "Net Proceeds",
+                "percent_of_goal": "% of Goal"
+            })
+            st.dataframe(display_df, use_container_width=True, hide_index=True,
+                         column_config={**currency_config("Goal Amount", "Amount Raised", "Expenses",
+                                                          "Net Proceeds"),
+                                        **percent_config("% of Goal")})
+            try:
+                fig = px.bar(display_df, x="Initiative Name", y=["Goal Amount", "Amount Raised"], barmode="group",
+                             title="Goal vs. Amount Raised",
+                             color_discrete_sequence=["#1f77b4", "#2ca02c"])
+                st.plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Error creating chart: {e}")
+        else:
+            st.info("No fundraising initiatives created yet.")
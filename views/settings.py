@@ -0,0 +1,212 @@
+import io
+import json
+import os
+import pkgutil
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from diagnostics import KEEP_TIMINGS, PAGE, instrument, is_enabled, recorder, set_enabled
+from finance import get_audit_log, get_book, set_auth_rules
+from storage import (is_parquet_backup, parquet_available, read_backup, read_parquet_backup, write_backup,
+                     write_parquet_backup)
+import views
+
+# Save and load functions
+@instrument
+def save_data(backup_format="JSON Lines"):
+    snapshot = get_book().snapshot()
+    
+    if backup_format == "Parquet":
+        if not parquet_available():
+            st.error("Parquet backups need the pyarrow package (pip install pyarrow)")
+            return
+        # Columnar tables in a zip archive
+        with tempfile.NamedTemporaryFile("wb", suffix=".zip", delete=False) as f:
+            write_parquet_backup(f, snapshot)
+            backup_path = f.name
+        file_name, mime = "financial_system_backup.zip", "application/zip"
+    else:
+        # Stream the backup a record at a time into a temporary file rather
+        # than building it as one JSON string
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", suffix=".jsonl", delete=False) as f:
+            write_backup(f, snapshot)
+            backup_path = f.name
+        file_name, mime = "financial_system_backup.jsonl", "application/x-ndjson"
+    
+    try:
+        # Provide download link
+        with open(backup_path, "rb") as backup:
+            st.download_button(
+                label="Download Data Backup",
+                data=backup,
+                file_name=file_name,
+                mime=mime
+            )
+    finally:
+        os.remove(backup_path)
+    
+    st.success("Data prepared for download")
+
+def load_data():
+    uploaded_file = st.file_uploader("Upload backup file", type=["jsonl", "json", "zip"])
+    
+    # The uploader keeps its file across reruns; only restore it once
+    if uploaded_file and st.session_state.get("restored_upload") != uploaded_file.file_id:
+        try:
+            if is_parquet_backup(uploaded_file):
+                if not parquet_available():
+                    st.error("Restoring a Parquet backup needs the pyarrow package (pip install pyarrow)")
+                    return
+                data = read_parquet_backup(uploaded_file)
+            else:
+                # Read the file record by record (older .json backups are
+                # still accepted)
+                progress = st.progress(0.0, text="Restoring backup...")
+                text = io.TextIOWrapper(uploaded_file, encoding="utf-8")
+                data = read_backup(text, progress=lambda done: progress.progress(done, text="Restoring backup..."))
+                text.detach()
+            
+            # Replace the shared books and the stored ledger with the backup
+            get_book().restore(data)
+            st.session_state.restored_upload = uploaded_file.file_id
+        except Exception as e:
+            st.error(f"Error loading data: {e}")
+            return
+        
+        st.success("Data loaded successfully")
+        st.rerun()
+
+# Settings function
+def show():
+    st.header("Settings")
+    
+    # Save/Load data
+    st.subheader("Data Backup and Restore")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.write("Save current data to a file:")
+        backup_format = st.radio("Backup format", ["JSON Lines", "Parquet"], horizontal=True,
+                                 help="Parquet files are smaller and faster to restore; they need pyarrow")
+        if st.button("Prepare Backup File"):
+            save_data(backup_format)
+    
+    with col2:
+        st.write("Load data from a backup file:")
+        load_data()
+    
+    # Authorization rules
+    st.subheader("Authorization Rules")
+    st.write("Rules are checked from top to bottom; a transaction needs one of the "
+             "authorizers of the first rule its amount fits under. Leave the last limit empty.")
+    rules = get_book().snapshot().auth_rules
+    rules_df = pd.DataFrame({
+        "Up to (KD)": [rule["up_to"] for rule in rules],
+        "Authorizers": [", ".join(rule["authorizers"]) for rule in rules]
+    })
+    edited_rules = st.data_editor(rules_df, num_rows="dynamic", hide_index=True, key="auth_rules_editor")
+    if st.button("Save Authorization Rules"):
+        edited_rules = edited_rules.dropna(how="all")
+        new_rules = [
+            {"up_to": None if pd.isna(up_to) else float(up_to),
+             "authorizers": [name.strip() for name in str(authorizers or "").split(",") if name.strip()]}
+            for up_to, authorizers in zip(edited_rules["Up to (KD)"], edited_rules["Authorizers"])
+        ]
+        success, message = set_auth_rules(new_rules)
+        if success:
+            st.success(message)
+        else:
+            st.error(message)
+    
+    show_audit_log()
+    show_diagnostics()
+
+def show_audit_log():
+    st.subheader("Audit Log")
+    audit = get_audit_log()
+    st.write("Every transaction, budget edit, event and fundraising change and restore is logged here. "
+             "Each entry is chained to the one before it by its hash, so any later change to the log shows up "
+             "when it is verified.")
+    if not audit.open_check.ok:
+        st.error(f"The audit log failed its check when the app started: {audit.open_check.problem}")
+    last_checkpoint = audit.checkpoints[-1]["seq"]
+    st.caption(f"{audit.seq:,} entries; last checkpoint at entry {last_checkpoint:,}.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        check = st.button("Verify Since Last Checkpoint")
+    with col2:
+        check_all = st.button("Verify Full History")
+    with col3:
+        if os.path.exists(audit.log_path):
+            with open(audit.log_path, "rb") as log:
+                st.download_button("Download Audit Log", data=log, file_name="audit.jsonl",
+                                   mime="application/x-ndjson")
+    if check or check_all:
+        result = audit.verify(full=check_all)
+        if result.ok:
+            st.success(f"Verified {result.checked:,} entries up to entry {result.last_seq:,}.")
+        else:
+            st.error(f"{result.problem}; the chain breaks after entry {result.last_seq:,}.")
+    
+    entries = audit.recent()
+    if entries:
+        st.write("Latest entries")
+        st.dataframe(pd.DataFrame({
+            "Entry": [entry["seq"] for entry in entries],
+            "Time": [entry["time"].replace("T", " ") for entry in entries],
+            "Change": [entry["op"] for entry in entries],
+            "Details": [json.dumps(entry["data"])[:200] for entry in entries],
+            "Hash": [entry["hash"][:12] for entry in entries]
+        }), hide_index=True, use_container_width=True)
+
+def show_diagnostics():
+    st.subheader("Diagnostics")
+    enabled = st.toggle("Collect timings", value=is_enabled(),
+                        help="Times page runs, the finance helpers and table and chart rendering "
+                             "for every session of the app")
+    if enabled != is_enabled():
+        set_enabled(enabled)
+    if not enabled:
+        st.caption("Timings are off.")
+        return
+    
+    st.caption(f"Percentiles are over the last {KEEP_TIMINGS} runs of each page or call (milliseconds).")
+    summary = recorder.summary()
+    timing_config = {name: st.column_config.NumberColumn(format="%.2f")
+                     for name in ["p50_ms", "p95_ms", "max_ms", "total_ms"]}
+    if summary.empty:
+        st.info("Nothing timed yet. Open a page to record a run.")
+    else:
+        pages = summary["kind"] == PAGE
+        st.write("Page runs")
+        st.dataframe(summary[pages].drop(columns="kind"), hide_index=True, use_container_width=True,
+                     column_config=timing_config)
+        st.write("Helpers, imports and rendering")
+        st.dataframe(summary[~pages], hide_index=True, use_container_width=True, column_config=timing_config)
+        counters = recorder.counter_frame()
+        if not counters.empty:
+            st.dataframe(counters, hide_index=True)
+    if st.button("Reset Timings"):
+        recorder.reset()
+        st.rerun()
+    
+    # cProfile dump of one page run
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        page = st.selectbox("Profile the next run of", [module.name for module in pkgutil.iter_modules(views.__path__)])
+    with col2:
+        st.write("")
+        if st.button("Profile Next Run"):
+            recorder.profile_page = page
+            st.info(f"The next run of the {page} page will be profiled.")
+    for profile in list(recorder.profiles):
+        with st.expander(f"{profile['page']} at {profile['at']} ({profile['seconds'] * 1000:.0f} ms)"):
+            st.code(profile["summary"], language=None)
+            st.download_button("Download .pstats", profile["pstats"],
+                               file_name=f"{profile['page']}-{profile['at'].replace(' ', '-').replace(':', '')}.pstats",
+                               mime="application/octet-stream",
+                               key=f"pstats-{profile['page']}-{profile['at']}")
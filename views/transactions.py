@@ -0,0 +1,207 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from finance import (add_transaction, add_transactions, check_authorization_batch, committee_members, get_book,
+                     record_label)
+from formatting import blank_zero_amounts, transaction_config
+from importer import IMPORT_FIELDS, guess_mapping, prepare_import, read_statement
+
+# Transactions function
+def show():
+    st.header("Transactions Management")
+    snapshot = get_book().snapshot()
+    
+    # Add new transaction form
+    with st.expander("Add New Transaction", expanded=True):
+        with st.form("transaction_form"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                date = st.date_input("Date", value=datetime.date.today())
+                description = st.text_input("Description")
+                
+                # Get all categories
+                categories = list(snapshot.budget["income"].keys()) + list(snapshot.budget["expenses"].keys())
+                category = st.selectbox("Category", categories)
+                
+                income = st.number_input("Income (KD)", min_value=0.0, format="%.2f")
+            
+            with col2:
+                expense = st.number_input("Expense (KD)", min_value=0.0, format="%.2f")
+                
+                # Get all possible authorizers
+                authorizers = list(committee_members.keys()) + ["School Admin", "Committee Vote"]
+                authorized_by = st.selectbox("Authorized By", authorizers)
+                
+                # Optional links to an event and a fundraising initiative
+                event_id = st.selectbox("Event", [None] + [event["id"] for event in snapshot.events],
+                                        format_func=lambda event_id: "None" if event_id is None
+                                        else record_label(snapshot.events, event_id, "date"))
+                initiative_id = st.selectbox("Fundraising Initiative",
+                                             [None] + [initiative["id"] for initiative in snapshot.fundraising],
+                                             format_func=lambda initiative_id: "None" if initiative_id is None
+                                             else record_label(snapshot.fundraising, initiative_id, "dates"))
+                
+                receipt_num = st.text_input("Receipt #")
+                notes = st.text_area("Notes", height=100)
+            
+            submit = st.form_submit_button("Add Transaction")
+            
+            if submit:
+                success, message = add_transaction(
+                    date.strftime("%Y-%m-%d"),
+                    description,
+                    category,
+                    income,
+                    expense,
+                    authorized_by,
+                    receipt_num,
+                    notes,
+                    event_id,
+                    initiative_id
+                )
+                
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+    
+    # Bulk import from a CSV file or bank statement export
+    with st.expander("Import Transactions from CSV"):
+        statement_file = st.file_uploader("CSV file or bank statement export", type=["csv"])
+        
+        if statement_file:
+            try:
+                statement = read_statement(statement_file)
+            except Exception as e:
+                st.error(f"Error reading file: {e}")
+                statement = None
+            
+            if statement is not None:
+                st.write(f"{len(statement)} rows found. Preview:")
+                st.dataframe(statement.head(5), use_container_width=True)
+                
+                # Map statement columns to transaction fields
+                st.write("**Column mapping** (use either amount or income/expense)")
+                guessed = guess_mapping(statement.columns)
+                options = ["(not in file)"] + list(statement.columns)
+                mapping = {}
+                field_columns = st.columns(3)
+                for i, field in enumerate(IMPORT_FIELDS):
+                    with field_columns[i % 3]:
+                        choice = st.selectbox(field, options,
+                                              index=options.index(guessed[field]) if field in guessed else 0,
+                                              key=f"import_{field}")
+                    if choice != "(not in file)":
+                        mapping[field] = choice
+                
+                col1, col2, col3 = st.columns(3)
+                
+                with col1:
+                    categories = list(snapshot.budget["income"].keys()) + list(snapshot.budget["expenses"].keys())
+                    default_category = st.selectbox("Default category", categories, key="import_default_category")
+                
+                with col2:
+                    authorizers = list(committee_members.keys()) + ["School Admin", "Committee Vote"]
+                    default_authorizer = st.selectbox("Default authorizer", authorizers, key="import_default_authorizer")
+                
+                with col3:
+                    dayfirst = st.checkbox("Dates are day first (DD/MM/YYYY)", value=True)
+                
+                if st.button("Validate and Import"):
+                    transactions, errors = prepare_import(
+                        statement,
+                        mapping,
+                        {"category": default_category, "authorized_by": default_authorizer},
+                        categories,
+                        dayfirst=dayfirst
+                    )
+                    
+                    # Check authorization for the whole batch at once
+                    allowed = check_authorization_batch(transactions[["income", "expense"]].max(axis=1),
+                                                        transactions["category"],
+                                                        transactions["authorized_by"])
+                    auth_errors = pd.Series("", index=statement.index).where(allowed, "not authorized for this amount")
+                    errors = (errors + "; " + auth_errors).str.strip("; ")
+                    valid = errors == ""
+                    
+                    if valid.any():
+                        success, message = add_transactions(transactions[valid])
+                        st.success(message)
+                    
+                    if not valid.all():
+                        # Line numbers count the header as line 1
+                        error_report = statement[~valid].assign(Line=statement.index[~valid] + 2,
+                                                                Error=errors[~valid])
+                        st.warning(f"{(~valid).sum()} rows were not imported")
+                        st.dataframe(error_report, use_container_width=True)
+                        st.download_button(
+                            label="Download Error Report",
+                            data=error_report.to_csv(index=False),
+                            file_name="import_errors.csv",
+                            mime="text/csv"
+                        )
+    
+    # View transactions (including any just added above)
+    st.subheader("Transaction History")
+    snapshot = get_book().snapshot()
+    
+    if len(snapshot.ledger):
+        ledger = snapshot.ledger
+        
+        # Filters are applied to the ledger's arrays; only the page on screen
+        # is turned into a table and sent to the browser
+        with st.expander("Filter Transactions"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                start_date = st.date_input("From", value=None, key="history_from")
+                end_date = st.date_input("To", value=None, key="history_to")
+                min_amount = st.number_input("Minimum Amount (KD)", min_value=0.0, value=None,
+                                             format="%.2f", key="history_min_amount")
+            
+            with col2:
+                filter_categories = st.multiselect("Category", ledger.labels("category"),
+                                                   key="history_categories")
+                filter_authorizers = st.multiselect("Authorized By", ledger.labels("authorized_by"),
+                                                    key="history_authorizers")
+                max_amount = st.number_input("Maximum Amount (KD)", min_value=0.0, value=None,
+                                             format="%.2f", key="history_max_amount")
+        
+        # Newest first (rows are kept in entry order)
+        rows = ledger.select(start_date, end_date, filter_categories, filter_authorizers,
+                             min_amount, max_amount)[::-1]
+        
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], key="history_page_size")
+        page_count = max(1, -(-len(rows) // page_size))
+        with col2:
+            page = min(st.number_input("Page", min_value=1, value=1, step=1, key="history_page"), page_count)
+        
+        first = (page - 1) * page_size
+        page_rows = rows[first:first + page_size]
+        # Select columns to display
+        display_columns = ["date", "description", "category", "income", "expense", "authorized_by", "receipt_num", "notes"]
+        transactions_df = blank_zero_amounts(ledger.frame().iloc[page_rows][display_columns])
+        st.dataframe(transactions_df, use_container_width=True, hide_index=True,
+                     column_config=transaction_config())
+        if len(rows):
+            st.caption(f"Showing {first + 1}-{first + len(page_rows)} of {len(rows)} transactions "
+                       f"(page {page} of {page_count})")
+        else:
+            st.caption("No transactions match the filters")
+        
+        # Export option (every row that matches the filters)
+        if st.button("Export Transactions to CSV"):
+            csv = ledger.frame().iloc[rows][display_columns].to_csv(index=False)
+            st.download_button(
+                label="Download CSV",
+                data=csv,
+                file_name="transactions.csv",
+                mime="text/csv"
+            )
+    else:
+        st.info("No transactions recorded yet.")